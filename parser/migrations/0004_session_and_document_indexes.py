@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-16 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0003_processeddocument_source_file_path"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="usersession",
+            index=models.Index(
+                fields=["last_activity"], name="usersession_last_activity_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usersession",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["last_activity"],
+                name="usersession_active_activity_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="processeddocument",
+            index=models.Index(
+                fields=["session", "created_at"], name="document_session_created_idx"
+            ),
+        ),
+    ]
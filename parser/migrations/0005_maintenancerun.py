@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-16 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0004_session_and_document_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MaintenanceRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("last_run", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-16 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parser", "0005_maintenancerun"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="processeddocument",
+            name="content_digest",
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="processeddocument",
+            index=models.Index(
+                fields=["session", "content_digest"], name="document_session_digest_idx"
+            ),
+        ),
+    ]
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.db import models
 from django.utils import timezone
 
@@ -11,6 +13,16 @@ class UserSession(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['last_activity'], name='usersession_last_activity_idx'),
+            # Partial index over active rows only: serves the active-session count and the
+            # inactive-session cleanup (is_active AND last_activity < cutoff) range scan
+            models.Index(
+                fields=['last_activity'],
+                name='usersession_active_activity_idx',
+                condition=models.Q(is_active=True),
+            ),
+        ]
     
     def __str__(self):
         return f"Session {self.session_key[:8]}... - {'Active' if self.is_active else 'Inactive'}"
@@ -26,6 +38,28 @@ class UserSession(models.Model):
         self.save()
 
 
+class MaintenanceRun(models.Model):
+    """Start time of the last run of a periodic maintenance job, shared by every process"""
+    name = models.CharField(max_length=50, unique=True)
+    last_run = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.name} - {self.last_run}"
+    
+    @classmethod
+    def claim(cls, name, min_interval):
+        """
+        Record a run of `name` unless one started less than min_interval seconds ago
+        
+        The conditional UPDATE is a single statement, so of several processes racing for
+        the same interval exactly one sees a row updated. Returns True for that caller.
+        """
+        now = timezone.now()
+        due_before = now - timedelta(seconds=min_interval)
+        cls.objects.get_or_create(name=name, defaults={'last_run': due_before})
+        return bool(cls.objects.filter(name=name, last_run__lte=due_before).update(last_run=now))
+
+
 class ProcessedDocument(models.Model):
     """Model to store processing results and file information"""
     FILE_TYPE_CHOICES = [
@@ -52,6 +86,8 @@ class ProcessedDocument(models.Model):
     )
     # Storage path of the originally uploaded file (e.g., Supabase key)
     source_file_path = models.CharField(max_length=500, blank=True, null=True)
+    # blake2b of the uploaded bytes; re-uploading them in the same session reuses source_file_path
+    content_digest = models.CharField(max_length=32, blank=True, null=True)
     error_message = models.TextField(blank=True, null=True)
     error_details = models.JSONField(default=dict, help_text="Detailed error information for debugging")
     retry_count = models.PositiveIntegerField(default=0, help_text="Number of retry attempts")
@@ -65,6 +101,10 @@ class ProcessedDocument(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['session', 'created_at'], name='document_session_created_idx'),
+            models.Index(fields=['session', 'content_digest'], name='document_session_digest_idx'),
+        ]
     
     def __str__(self):
         return f"{self.filename} - {self.get_processing_status_display()}"
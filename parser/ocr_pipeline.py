@@ -1,6 +1,7 @@
 import io
 import json
 import os
+import functools
 from typing import Dict, Any, List
 from datetime import datetime
 
@@ -15,6 +16,11 @@ try:
 except Exception:  # pragma: no cover
     genai = None
 
+try:
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover
+    json_loads = json.loads
+
 
 # --- Image helpers ---
 
@@ -72,8 +78,10 @@ def images_from_pdf(file_obj) -> List[Image.Image]:
         for i, page in enumerate(doc):
             if max_pages > 0 and i >= max_pages:
                 break
-            pix = page.get_pixmap(dpi=dpi)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+            # No alpha, so samples are packed RGB; read them through the memoryview
+            # (one copy into Pillow) and honour the stride in case rows are padded
+            pix = page.get_pixmap(dpi=dpi, alpha=False)
+            img = Image.frombuffer("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1)
             images.append(img)
     finally:
         doc.close()
@@ -87,8 +95,10 @@ def _get_gemini_model_name() -> str:
     return os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 
 
-def _make_model():
-    """Create a GenerativeModel, falling back if the requested model isn't available."""
+@functools.lru_cache(maxsize=4)
+def _make_model(api_key: str):
+    """Create a GenerativeModel once per key, falling back if the requested model isn't available."""
+    genai.configure(api_key=api_key)
     name = _get_gemini_model_name()
     try:
         return genai.GenerativeModel(name)
@@ -127,8 +137,7 @@ def structure_with_gemini_vision(images: List[Image.Image]) -> Dict[str, Any]:
         # Fallback to empty text structure
         return _fallback_structure("")
 
-    genai.configure(api_key=api_key)
-    model = _make_model()
+    model = _make_model(api_key)
     prompt = (
         "You are an expert multilingual document and table parser for banking PDFs and scans.\n"
         "The pages may contain English and Amharic (Ethiopic). Detect languages automatically.\n"
@@ -207,7 +216,7 @@ def structure_with_gemini_vision(images: List[Image.Image]) -> Dict[str, Any]:
         return _fallback_structure("")
 
     try:
-        data = json.loads(_extract_json(out))
+        data = json_loads(_extract_json(out))
         if not isinstance(data, dict) or "tables" not in data:
             return _fallback_structure("")
         return data
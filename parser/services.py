@@ -1,32 +1,96 @@
 import os
 import uuid
+import shutil
+import functools
+import hashlib
 from datetime import datetime, timedelta
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from supabase import create_client, Client
 import logging
 from PIL import Image
 import io
-import fitz  # PyMuPDF for PDF processing
 import json
 import re
 import time
-from typing import Dict, Any, Optional, List
-import google.generativeai as genai
+from typing import Callable, Dict, Any, Optional, List, Iterator, NamedTuple
 from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 
-# File generation imports
-from openpyxl import Workbook
-from openpyxl.styles import Font
-from openpyxl.utils import get_column_letter
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib import colors
-from docx import Document
+# Heavy libraries (google.generativeai, openpyxl, reportlab, python-docx) are imported
+# inside the code paths that use them so storage/session-only workers never load them
+
+try:
+    # orjson decodes LLM JSON several times faster; its errors subclass json.JSONDecodeError
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover
+    json_loads = json.loads
+
+# Decodes the first JSON object in an LLM reply that wraps it in prose
+_JSON_DECODER = json.JSONDecoder()
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=4096)
+def _pretty(key: str) -> str:
+    """Turn a snake_case key into a display label (cached per unique key)"""
+    return key.replace('_', ' ').title()
+
+
+def _chunk_text(chunk: Any) -> str:
+    """Text of one streamed Gemini chunk; empty if it carries no text parts"""
+    try:
+        return chunk.text or ""
+    except Exception:
+        pass
+    buf = []
+    for cand in getattr(chunk, "candidates", []) or []:
+        content = getattr(cand, "content", None)
+        for p in (getattr(content, "parts", None) if content else None) or []:
+            t = getattr(p, "text", None)
+            if t:
+                buf.append(t)
+            elif isinstance(p, dict) and p.get("text"):
+                buf.append(str(p["text"]))
+    return "".join(buf)
+
+
+def _collect_json_stream(pieces: Iterator[str]) -> str:
+    """Join streamed text, stopping as soon as the first top-level JSON object is closed"""
+    buf = []
+    depth = 0
+    in_string = escaped = False
+    for piece in pieces:
+        buf.append(piece)
+        for ch in piece:
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == '\\':
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = depth > 0
+            elif ch == '{':
+                depth += 1
+            elif ch == '}' and depth:
+                depth -= 1
+                if not depth:
+                    return "".join(buf)
+    return "".join(buf)
+
+
+def _excel_value(value: Any) -> Any:
+    """Keep values openpyxl can store natively; map None to '' and stringify the rest"""
+    if value is None:
+        return ''
+    if isinstance(value, (str, int, float, datetime)):
+        return value
+    return str(value)
+
+
 class ErrorHandler:
     """Simplified error handling utility"""
     
@@ -57,17 +121,77 @@ class ErrorHandler:
         }
 
 
+@functools.lru_cache(maxsize=1)
+def _get_supabase() -> Client:
+    """Create the Supabase client once per process so its HTTP sessions stay warm.
+
+    Failures are not cached, so a misconfigured or unreachable project is
+    retried on the next service construction.
+    """
+    # Use service role key for server-side operations
+    api_key = getattr(settings, 'SUPABASE_SERVICE_KEY', None) or settings.SUPABASE_KEY
+    return create_client(settings.SUPABASE_URL, api_key)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_gemini(model_name: str):
+    """Configure Gemini and build each model once per process so its channel is reused"""
+    import google.generativeai as genai
+    genai.configure(api_key=settings.GEMINI_API_KEY)
+    return genai.GenerativeModel(model_name)
+
+
+def _time_sortable_id() -> uuid.UUID:
+    """UUIDv7: 48-bit millisecond timestamp then random bits, so names list in upload order"""
+    ms = time.time_ns() // 1_000_000
+    value = int.from_bytes(ms.to_bytes(6, 'big') + os.urandom(10), 'big')
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
+# The stdlib grows uuid7() in Python 3.14
+_new_object_id = getattr(uuid, 'uuid7', _time_sortable_id)
+
+
+def _content_digest(file, file_content) -> str:
+    """blake2b of the upload; file_content is the bytes, or the temp path for disk-backed files"""
+    hasher = hashlib.blake2b(digest_size=16)
+    if isinstance(file_content, bytes):
+        hasher.update(file_content)
+    else:
+        for chunk in file.chunks():
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _parse_cache_key(text: str, document_type: str, ocr_engine: str) -> str:
+    """Cache key for an LLM parse; the inputs fully determine the prompt"""
+    digest = hashlib.blake2b(f"{document_type}\0{ocr_engine}\0{text}".encode(), digest_size=16).hexdigest()
+    return f"parser:llm_parse:{digest}"
+
+
+def _find_upload(session_key: str, digest: str) -> Optional[str]:
+    """
+    Storage path of an earlier upload of the same bytes in this session
+    
+    The digest lives on ProcessedDocument, so every worker sees it and session
+    cleanup, which deletes the rows together with the files, invalidates it.
+    """
+    from .models import ProcessedDocument
+    return ProcessedDocument.objects.filter(
+        session__session_key=session_key,
+        content_digest=digest,
+        source_file_path__isnull=False
+    ).values_list('source_file_path', flat=True).first()
+
+
 class SupabaseStorageService:
     """Service for handling file uploads to Supabase Storage"""
     
     def __init__(self):
         try:
-            # Use service role key for server-side operations
-            api_key = getattr(settings, 'SUPABASE_SERVICE_KEY', None) or settings.SUPABASE_KEY
-            self.supabase: Client = create_client(
-                settings.SUPABASE_URL,
-                api_key
-            )
+            self.supabase: Client = _get_supabase()
             self.bucket_name = settings.SUPABASE_BUCKET_NAME
         except Exception:
             self.supabase = None
@@ -81,16 +205,37 @@ class SupabaseStorageService:
             return ErrorHandler.error('Invalid file')
         
         # Generate filename and read content
-        unique_filename = f"{session_key}/{uuid.uuid4()}{os.path.splitext(file.name)[1] or '.tmp'}"
+        unique_filename = f"{session_key}/{_new_object_id()}{os.path.splitext(file.name)[1] or '.tmp'}"
         
         try:
-            file.seek(0)
-            file_content = file.read()
-            if not file_content:
-                return ErrorHandler.error('Empty file')
+            if hasattr(file, 'temporary_file_path'):
+                # Disk-backed upload: hand storage3 the path so the body is streamed from disk
+                if not file.size:
+                    return ErrorHandler.error('Empty file')
+                file_content = file.temporary_file_path()
+            else:
+                file.seek(0)
+                file_content = file.read()
+                if not file_content:
+                    return ErrorHandler.error('Empty file')
         except Exception:
             return ErrorHandler.error('File read failed')
         
+        # Re-submitting identical bytes in the same session reuses the earlier upload
+        digest = _content_digest(file, file_content)
+        existing_path = _find_upload(session_key, digest)
+        if existing_path:
+            try:
+                public_url = self.supabase.storage.from_(self.bucket_name).get_public_url(existing_path)
+            except Exception:
+                public_url = None
+            return {
+                'success': True,
+                'file_path': existing_path,
+                'public_url': public_url,
+                'content_digest': digest
+            }
+        
         # Upload with 2-attempt retry
         for attempt in range(2):
             try:
@@ -107,11 +252,13 @@ class SupabaseStorageService:
                     except Exception:
                         public_url = None
                     
-                    return {
+                    result = {
                         'success': True,
                         'file_path': unique_filename,
-                        'public_url': public_url
+                        'public_url': public_url,
+                        'content_digest': digest
                     }
+                    return result
                     
             except Exception as e:
                 logger.error(f"Upload attempt {attempt + 1} failed: {str(e)}")
@@ -122,6 +269,13 @@ class SupabaseStorageService:
         
         return ErrorHandler.error('Upload failed')
     
+    def upload_files(self, files, session_key, batch_size=8):
+        """Upload several files concurrently; results come back in input order"""
+        if not files:
+            return []
+        with ThreadPoolExecutor(max_workers=min(batch_size, len(files))) as executor:
+            return list(executor.map(lambda f: self.upload_file(f, session_key), files))
+    
     def delete_file(self, file_path):
         """Delete file from storage"""
         try:
@@ -143,6 +297,22 @@ class SupabaseStorageService:
         except Exception:
             return False
     
+    def cleanup_sessions_files(self, session_keys):
+        """Clean up files for several sessions with a single remove call"""
+        try:
+            bucket = self.supabase.storage.from_(self.bucket_name)
+            file_paths = [
+                f"{key}/{f['name']}"
+                for key in session_keys
+                for f in (bucket.list(key) or [])
+            ]
+            if file_paths:
+                response = bucket.remove(file_paths)
+                return response and not hasattr(response, 'error')
+            return True
+        except Exception:
+            return False
+    
     def get_file_content(self, file_path):
         """Download file content"""
         try:
@@ -151,48 +321,78 @@ class SupabaseStorageService:
             return None
 
 
+# Sessions purged per transaction by the scheduled cleanup
+CLEANUP_BATCH_SIZE = 1000
+
+# Scheduled cleanups closer together than this are skipped; the last start time lives in
+# the database (MaintenanceRun) because each cron run is a separate process
+CLEANUP_MIN_INTERVAL = 300
+CLEANUP_RUN_NAME = 'scheduled_cleanup'
+
+
+# Raw deletes: nothing has a foreign key into ProcessedDocument and no delete signals are
+# registered, so QuerySet._raw_delete() removes the same rows as delete() without loading
+# them into the collector. Revisit the cleanup paths below if either of those changes.
 class FileCleanupService:
     """Service for managing file cleanup and storage maintenance"""
     
     def __init__(self):
         self.storage_service = SupabaseStorageService()
     
-    def cleanup_expired_files(self, hours_old=1):
-        """Clean up files older than specified hours"""
+    def cleanup_expired_files(self, hours_old=1, limit=None):
+        """Clean up files older than specified hours; limit caps the sessions removed per call"""
         from .models import ProcessedDocument, UserSession
         from django.utils import timezone
         
         try:
             cutoff_time = timezone.now() - timedelta(hours=hours_old)
             
-            # Find and delete old sessions and documents
             old_sessions = UserSession.objects.filter(last_activity__lt=cutoff_time)
-            sessions_count = old_sessions.count()
-            documents_count = ProcessedDocument.objects.filter(session__in=old_sessions).count()
+            if limit:
+                session_ids = list(old_sessions.values_list('pk', flat=True)[:limit])
+                old_sessions = UserSession.objects.filter(pk__in=session_ids)
+                old_documents = ProcessedDocument.objects.filter(session_id__in=session_ids)
+            else:
+                old_documents = ProcessedDocument.objects.filter(session__last_activity__lt=cutoff_time)
             
-            # Delete old documents and sessions
-            ProcessedDocument.objects.filter(session__in=old_sessions).delete()
-            old_sessions.delete()
+            # Single DELETE per table, bypassing the cascade collector; documents go first for the FK
+            with transaction.atomic():
+                documents_count = old_documents._raw_delete(old_documents.db)
+                sessions_count = old_sessions._raw_delete(old_sessions.db)
             
-            return ErrorHandler.success(f"Cleaned up {sessions_count} sessions")
+            result = ErrorHandler.success(f"Cleaned up {sessions_count} sessions")
+            result['database_cleanup'] = {
+                'sessions_deleted': sessions_count,
+                'documents_deleted': documents_count
+            }
+            return result
             
         except Exception as e:
             logger.error(f"Cleanup failed: {str(e)}")
             return ErrorHandler.error(f"Cleanup failed: {str(e)}")
     
-    def cleanup_session_manually(self, session_key):
-        """Manually clean up a specific session"""
+    def cleanup_session_manually(self, session_key, fast=True):
+        """Manually clean up a specific session; fast=False goes through the collector and signals"""
         from .models import ProcessedDocument, UserSession
         
         try:
-            # Clean up storage files
+            # Clean up storage files and any local output folders
             self.storage_service.cleanup_session_files(session_key)
+            _remove_output_dirs([session_key])
             
             # Clean up database records
+            if fast:
+                documents = ProcessedDocument.objects.filter(session__session_key=session_key)
+                documents_count = documents._raw_delete(documents.db)
+                sessions = UserSession.objects.filter(session_key=session_key)
+                if not sessions._raw_delete(sessions.db):
+                    return ErrorHandler.success("Session not found")
+                return ErrorHandler.success(f"Cleaned up session with {documents_count} documents")
+            
             try:
                 session = UserSession.objects.get(session_key=session_key)
-                documents_count = session.documents.count()
-                session.documents.all().delete()
+                # delete() reports how many rows it removed, so no COUNT query first
+                documents_count, _ = session.documents.all().delete()
                 session.delete()
                 return ErrorHandler.success(f"Cleaned up session with {documents_count} documents")
             except UserSession.DoesNotExist:
@@ -203,12 +403,35 @@ class FileCleanupService:
             return ErrorHandler.error(f"Manual cleanup failed: {str(e)}")
     
     def schedule_automatic_cleanup(self):
-        """Perform automatic cleanup for scheduled maintenance"""
-        result = self.cleanup_expired_files(hours_old=1)
+        """Perform automatic cleanup for scheduled maintenance, at most once per CLEANUP_MIN_INTERVAL"""
+        from .models import MaintenanceRun
         
-        if not result.get('success'):
-            logger.error(f"Automatic cleanup failed: {result.get('error')}")
+        if not MaintenanceRun.claim(CLEANUP_RUN_NAME, CLEANUP_MIN_INTERVAL):
+            result = ErrorHandler.success("Cleanup ran recently, skipped")
+            result['skipped'] = True
+            return result
         
+        # Inactive sessions first, so their storage files go before the DB rows are purged
+        try:
+            SessionService.cleanup_inactive_sessions()
+        except Exception as e:
+            logger.error(f"Inactive session cleanup failed: {str(e)}")
+        
+        # Bounded batches keep each transaction short even after a long outage
+        totals = {'sessions_deleted': 0, 'documents_deleted': 0}
+        while True:
+            result = self.cleanup_expired_files(hours_old=1, limit=CLEANUP_BATCH_SIZE)
+            if not result.get('success'):
+                logger.error(f"Automatic cleanup failed: {result.get('error')}")
+                return result
+            batch = result['database_cleanup']
+            totals['sessions_deleted'] += batch['sessions_deleted']
+            totals['documents_deleted'] += batch['documents_deleted']
+            if batch['sessions_deleted'] < CLEANUP_BATCH_SIZE:
+                break
+        
+        result = ErrorHandler.success(f"Cleaned up {totals['sessions_deleted']} sessions")
+        result['database_cleanup'] = totals
         return result
 
 
@@ -240,21 +463,95 @@ class SessionService:
             return user_session, True, None
     
     @staticmethod
-    def cleanup_inactive_sessions():
-        """Clean up sessions inactive for more than 1 hour"""
+    def cleanup_inactive_sessions(chunk_size=200):
+        """Clean up sessions inactive for more than 1 hour, in chunks"""
         from .models import UserSession
+        from django.utils import timezone
         
-        cutoff_time = datetime.now() - timedelta(hours=1)
-        inactive_sessions = UserSession.objects.filter(
+        cutoff_time = timezone.now() - timedelta(hours=1)
+        inactive = UserSession.objects.filter(
             last_activity__lt=cutoff_time,
             is_active=True
-        )
+        ).order_by('pk')
         
-        cleanup_service = FileCleanupService()
-        for session in inactive_sessions:
-            cleanup_service.cleanup_session_manually(session.session_key)
+        storage_service = SupabaseStorageService()
+        cleaned = 0
+        last_pk = 0
+        while True:
+            # Each slice is fetched in full before its rows are deleted: iterating a cursor
+            # over a table while deleting from it is undefined on SQLite
+            rows = list(inactive.filter(pk__gt=last_pk).values_list('pk', 'session_key')[:chunk_size])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            cleaned += SessionService._cleanup_session_chunk(storage_service, [key for _pk, key in rows])
+            if len(rows) < chunk_size:
+                break
+        return cleaned
+    
+    @staticmethod
+    def _cleanup_session_chunk(storage_service, session_keys):
+        """Remove storage files and DB rows for one chunk of sessions"""
+        from .models import ProcessedDocument, UserSession
         
-        inactive_sessions.update(is_active=False)
+        storage_service.cleanup_sessions_files(session_keys)
+        _remove_output_dirs(session_keys)
+        documents = ProcessedDocument.objects.filter(session__session_key__in=session_keys)
+        documents._raw_delete(documents.db)
+        sessions = UserSession.objects.filter(session_key__in=session_keys)
+        return sessions._raw_delete(sessions.db)
+
+
+# A successful provider probe in LLMService.test_api_connection is trusted for this long
+API_PROBE_CACHE_TIMEOUT = 30
+
+
+def _cached_probe(provider: str, probe: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Status dict ({'available', 'error'}) from probe(), reusing a recent success
+    
+    Only successes are cached, as a flag under parser:api_probe:<provider>, so a failing
+    provider is re-probed on every check. Shared by both LLMService implementations.
+    """
+    cache_key = f"parser:api_probe:{provider}"
+    if cache.get(cache_key):
+        return {'available': True, 'error': None}
+    result = probe()
+    if result['available']:
+        cache.set(cache_key, True, timeout=API_PROBE_CACHE_TIMEOUT)
+    return result
+
+
+# Invariant head of the text-structuring prompt, built once; only the document type and
+# text are appended per call, so the prompt prefix stays identical across requests
+_TEXT_PARSING_PROMPT_PREFIX = """You are an expert multilingual financial document parser.
+
+Task: Structure the provided text into JSON format WITHOUT modifying any characters, words, or formatting. If no table can be inferred, fall back to a single table named 'main' with headers ['text'] and rows = each input line as a separate row (preserve order).
+
+CRITICAL CHARACTER PRESERVATION RULES:
+- NEVER autocorrect, fix, or modify any characters, words, or text from the input
+- NEVER fix what appears to be OCR errors or typos - preserve them EXACTLY
+- NEVER transliterate Amharic/Ethiopic characters to Latin script
+- NEVER normalize or standardize formatting - keep original spacing, punctuation
+- NEVER correct obvious mistakes like 0/O, 1/l, 5/S - transcribe exactly as provided
+- NEVER standardize dates or numbers - keep original format exactly
+- NEVER add missing punctuation or correct grammar
+- NEVER change case (uppercase/lowercase) from what is provided
+
+STRUCTURING RULES:
+- Copy each character, symbol, and space EXACTLY as provided in the input text
+- For tables: preserve headers exactly as written; maintain original column structure
+- For key:value pairs: output as two-column table [key, value] with exact text
+- For lists/paragraphs: output as single-column table preserving original line breaks
+- Maintain original text order and formatting
+- If structure is unclear, default to single-column table with original text
+
+Output STRICT JSON only with this schema:
+{
+  "tables": [ { "name": string, "headers": [string], "rows": [[string]] } ]
+}
+
+"""
 
 
 class LLMService:
@@ -266,12 +563,11 @@ class LLMService:
         self.vision_client = None
         if hasattr(settings, 'GEMINI_API_KEY') and settings.GEMINI_API_KEY:
             try:
-                genai.configure(api_key=settings.GEMINI_API_KEY)
                 # Default to Gemini 2.5 Flash, with Lite used elsewhere as fallback
                 model_name = getattr(settings, 'GEMINI_MODEL', 'gemini-2.5-flash')
-                self.gemini_client = genai.GenerativeModel(model_name)
+                self.gemini_client = _get_gemini(model_name)
                 vision_model = getattr(settings, 'GEMINI_VISION_MODEL', 'gemini-2.5-flash')
-                self.vision_client = genai.GenerativeModel(vision_model)
+                self.vision_client = _get_gemini(vision_model)
                 logger.info(f"Gemini API initialized successfully with model: {model_name}")
             except Exception as e:
                 logger.warning(f"Failed to initialize Gemini API: {str(e)}")
@@ -285,9 +581,17 @@ class LLMService:
         
         # Try Gemini API first if available
         if self.gemini_client:
+            # Re-uploads of the same document reuse the earlier answer instead of a new API call
+            cache_key = _parse_cache_key(text, document_type, ocr_engine)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                cached['cached'] = True
+                return cached
+            
             logger.info(f"Using Gemini API for document parsing (engine: {ocr_engine})")
             gemini_result = self._try_gemini_parsing(text, document_type, ocr_engine)
             if gemini_result['success']:
+                cache.set(cache_key, gemini_result, timeout=3600)
                 return gemini_result
             else:
                 logger.warning(f"Gemini API failed: {gemini_result.get('error')}. Falling back to pattern matching.")
@@ -363,39 +667,16 @@ class LLMService:
             try:
                 prompt = self._build_parsing_prompt(text, document_type, ocr_engine)
                 
-                # Run the API call with a timeout to prevent hangs
+                # Stream the response and stop once the top-level JSON object closes;
+                # the timeout covers the whole stream to prevent hangs
                 def _call_model():
-                    return self.gemini_client.generate_content(prompt)
+                    stream = self.gemini_client.generate_content(prompt, stream=True)
+                    return _collect_json_stream(_chunk_text(chunk) for chunk in stream)
                 
                 with ThreadPoolExecutor(max_workers=1) as executor:
                     future = executor.submit(_call_model)
-                    response = future.result(timeout=90)  # Increased timeout for better models
+                    resp_text = future.result(timeout=90).strip()  # Increased timeout for better models
                 
-                # Safely extract text; skip if none
-                resp_text = ""
-                try:
-                    resp_text = (getattr(response, "text", None) or "").strip()
-                except Exception:
-                    resp_text = ""
-                if not resp_text:
-                    try:
-                        for cand in getattr(response, "candidates", []) or []:
-                            content = getattr(cand, "content", None)
-                            parts = getattr(content, "parts", None) if content else None
-                            if not parts:
-                                continue
-                            buf = []
-                            for p in parts:
-                                t = getattr(p, "text", None)
-                                if t:
-                                    buf.append(t)
-                                elif isinstance(p, dict) and p.get("text"):
-                                    buf.append(str(p["text"]))
-                            if buf:
-                                resp_text = "\n".join(buf)
-                                break
-                    except Exception:
-                        resp_text = ""
                 if not resp_text:
                     continue
                 
@@ -599,34 +880,7 @@ class LLMService:
     
     def _build_parsing_prompt(self, text: str, document_type: str, ocr_engine: str = "vision") -> str:
         """Prompt for structuring text while preserving exact character representation."""
-        return f"""You are an expert multilingual financial document parser.
-
-Task: Structure the provided text into JSON format WITHOUT modifying any characters, words, or formatting. If no table can be inferred, fall back to a single table named 'main' with headers ['text'] and rows = each input line as a separate row (preserve order).
-
-CRITICAL CHARACTER PRESERVATION RULES:
-- NEVER autocorrect, fix, or modify any characters, words, or text from the input
-- NEVER fix what appears to be OCR errors or typos - preserve them EXACTLY
-- NEVER transliterate Amharic/Ethiopic characters to Latin script
-- NEVER normalize or standardize formatting - keep original spacing, punctuation
-- NEVER correct obvious mistakes like 0/O, 1/l, 5/S - transcribe exactly as provided
-- NEVER standardize dates or numbers - keep original format exactly
-- NEVER add missing punctuation or correct grammar
-- NEVER change case (uppercase/lowercase) from what is provided
-
-STRUCTURING RULES:
-- Copy each character, symbol, and space EXACTLY as provided in the input text
-- For tables: preserve headers exactly as written; maintain original column structure
-- For key:value pairs: output as two-column table [key, value] with exact text
-- For lists/paragraphs: output as single-column table preserving original line breaks
-- Maintain original text order and formatting
-- If structure is unclear, default to single-column table with original text
-
-Output STRICT JSON only with this schema:
-{{
-  "tables": [ {{ "name": string, "headers": [string], "rows": [[string]] }} ]
-}}
-
-Document type: {document_type}
+        return f"""{_TEXT_PARSING_PROMPT_PREFIX}Document type: {document_type}
 Input text to preserve exactly:
 {text}
 """
@@ -665,11 +919,16 @@ Return structured JSON that contains the document's exact visual content without
             
             # Try to find JSON in the response
             json_start = cleaned_text.find('{')
-            json_end = cleaned_text.rfind('}') + 1
             
-            if json_start >= 0 and json_end > json_start:
-                json_text = cleaned_text[json_start:json_end]
-                parsed_data = json.loads(json_text)
+            if json_start >= 0:
+                if json_start == 0 and cleaned_text.endswith('}'):
+                    # Bare object, the usual case: decode it whole
+                    try:
+                        return json_loads(cleaned_text)
+                    except json.JSONDecodeError:
+                        pass
+                # Decode one object from the first brace, ignoring any prose after it
+                parsed_data, _ = _JSON_DECODER.raw_decode(cleaned_text, json_start)
                 
                 # If parsed successfully, return as-is (no template enforcement)
                 return parsed_data
@@ -692,18 +951,22 @@ Return structured JSON that contains the document's exact visual content without
             return None
     
     def test_api_connection(self) -> Dict[str, Any]:
-        """Test Gemini API connection"""
+        """Test Gemini API connection; a success is reused for 30 s so health checks stay cheap"""
+        return {'gemini': _cached_probe('gemini', self._probe_gemini)}
+    
+    def _probe_gemini(self) -> Dict[str, Any]:
+        """Send a minimal request to Gemini"""
         if not self.gemini_client:
-            return {'gemini': {'available': False, 'error': 'API key not configured'}}
+            return {'available': False, 'error': 'API key not configured'}
         
         try:
             test_response = self.gemini_client.generate_content("Test connection. Respond with 'OK'.")
             if test_response.text and 'OK' in test_response.text:
-                return {'gemini': {'available': True, 'error': None}}
+                return {'available': True, 'error': None}
             else:
-                return {'gemini': {'available': False, 'error': 'Unexpected response'}}
+                return {'available': False, 'error': 'Unexpected response'}
         except Exception as e:
-            return {'gemini': {'available': False, 'error': str(e)}}
+            return {'available': False, 'error': str(e)}
 
 
 class DataStructuringService:
@@ -712,6 +975,14 @@ class DataStructuringService:
     def structure_document_data(self, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
         """Structure parsed document data exactly as extracted - no metadata added"""
         try:
+            # Already in the generators' native tables schema: pass straight through
+            if isinstance(parsed_data.get('tables'), list):
+                structured_data = {
+                    key: value for key, value in parsed_data.items()
+                    if key not in ('document_type', 'parsing_method')
+                }
+                return ErrorHandler.success('Data structured successfully', structured_data)
+            
             # Return the parsed data as-is, without adding metadata or processing timestamps
             structured_data = {}
             
@@ -729,7 +1000,7 @@ class DataStructuringService:
                     else:
                         structured_data[key] = value
                 elif value:  # Any other non-empty value
-                    structured_data[key] = [{'field': key.replace('_', ' ').title(), 'value': str(value)}]
+                    structured_data[key] = [{'field': _pretty(key), 'value': str(value)}]
             
             return ErrorHandler.success('Data structured successfully', structured_data)
             
@@ -745,7 +1016,7 @@ class DataStructuringService:
                 return value.strip() or 'N/A'
             return str(value)
         return [
-            {'field': key.replace('_', ' ').title(), 'value': _normalize_value(value)}
+            {'field': _pretty(str(key)), 'value': _normalize_value(value)}
             for key, value in data.items()
         ]
     
@@ -778,32 +1049,99 @@ class DataStructuringService:
 
 
 
+@functools.cache
+def _ensure_temp_dir() -> str:
+    """Create the shared temp_files directory once per process and return its path"""
+    temp_dir = os.path.join(settings.BASE_DIR, 'temp_files')
+    os.makedirs(temp_dir, exist_ok=True)
+    return temp_dir
+
+
+def _remove_output_dirs(session_keys) -> int:
+    """Delete the per-run output folders generate_all_formats left for these sessions.
+
+    One scan of temp_files serves any number of sessions; each match is removed with rmtree.
+    """
+    prefixes = tuple(f"{key}_" for key in session_keys)
+    if not prefixes:
+        return 0
+    try:
+        with os.scandir(_ensure_temp_dir()) as entries:
+            targets = [e.path for e in entries if e.name.startswith(prefixes) and e.is_dir(follow_symlinks=False)]
+    except OSError:
+        return 0
+    for path in targets:
+        shutil.rmtree(path, ignore_errors=True)
+    return len(targets)
+
+
+@functools.cache
+def _pdf_styles():
+    """Build ReportLab's sample stylesheet once; it is only read from afterwards"""
+    from reportlab.lib.styles import getSampleStyleSheet
+    return getSampleStyleSheet()
+
+
+@functools.cache
+def _docx_template() -> bytes:
+    """Serialize python-docx's default template once so later documents skip the package lookup"""
+    from docx import Document
+    buf = io.BytesIO()
+    Document().save(buf)
+    return buf.getvalue()
+
+
+class Section(NamedTuple):
+    """One renderable block of structured data, shared by the Excel/PDF/DOC generators"""
+    name: str
+    kind: str  # 'records', 'table', 'kv' or 'list'
+    headers: Optional[List[str]]
+    rows: List[List[Any]]
+
+
+def _has_tables(data: Any) -> bool:
+    """True for the LLM "tables" schema, which Excel and PDF render table by table"""
+    return isinstance(data, dict) and isinstance(data.get('tables'), list) and bool(data['tables'])
+
+
 class FileGenerationService:
     """Simplified service for generating output files in Excel, PDF, and DOC formats"""
     
     def __init__(self):
-        self.temp_dir = os.path.join(settings.BASE_DIR, 'temp_files')
-        os.makedirs(self.temp_dir, exist_ok=True)
+        self.temp_dir = _ensure_temp_dir()
     
     def generate_all_formats(self, structured_data: Dict[str, Any], session_key: str) -> Dict[str, Any]:
         """Generate all three output formats with simplified error handling"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         base_filename = f"document_{session_key}_{timestamp}"
+        # Keep each run's outputs together so cleanup is a single rmtree
+        session_dir = os.path.join(self.temp_dir, f"{session_key}_{timestamp}")
+        os.makedirs(session_dir, exist_ok=True)
         
-        results = {'success': True, 'files': {}, 'errors': []}
+        results = {'success': True, 'files': {}, 'errors': [], 'dir': session_dir}
         
-        # Generate files with basic error handling
-        for format_type, generator_method in [
+        # Classify sections once and let every generator render from the same list
+        sections = list(self._iter_sections(structured_data))
+        
+        # Generate the three independent files concurrently with basic error handling
+        generators = [
             ('excel', self.generate_excel_file),
             ('pdf', self.generate_pdf_file), 
             ('doc', self.generate_doc_file)
-        ]:
-            result = generator_method(structured_data, base_filename)
+        ]
+        with ThreadPoolExecutor(max_workers=len(generators)) as executor:
+            futures = [
+                (format_type, executor.submit(generator_method, structured_data, base_filename, session_dir, sections))
+                for format_type, generator_method in generators
+            ]
+        
+        for format_type, future in futures:
+            result = future.result()
             if result.get('success'):
                 results['files'][format_type] = {
                     'path': result['path'],
                     'filename': result['filename'],
-                    'size': os.path.getsize(result['path']) if os.path.exists(result['path']) else 0
+                    'size': result.get('size', 0)
                 }
             else:
                 results['errors'].append(f"{format_type.upper()} generation failed")
@@ -811,107 +1149,121 @@ class FileGenerationService:
         
         return results
     
-    def generate_excel_file(self, data: Dict[str, Any], base_filename: str) -> Dict[str, Any]:
+    def _iter_sections(self, data: Dict[str, Any]) -> Iterator[Section]:
+        """Yield a Section(name, kind, headers, rows) for every non-empty section.
+
+        kind is 'records' (list of dicts with an 'id'), 'table' (other list of
+        dicts), 'kv' (field/value pairs) or 'list' (bare values). Row values are
+        left unconverted; each generator applies its own formatting.
+        """
+        for section_name, section_data in data.items():
+            if not section_data or section_name == 'metadata':
+                continue
+            if isinstance(section_data, list) and isinstance(section_data[0], dict):
+                first_keys = list(section_data[0].keys())
+                headers = [k for k in first_keys if k != 'id'] or first_keys
+                rows = [[item.get(h, '') for h in headers] for item in section_data if isinstance(item, dict)]
+                kind = 'records' if 'id' in section_data[0] else 'table'
+                yield Section(section_name, kind, headers, rows)
+            elif isinstance(section_data, list):
+                # list of primitives or dicts with field/value
+                if any(isinstance(x, dict) and ('field' in x or 'value' in x) for x in section_data):
+                    rows = [[x.get('field', ''), x.get('value', '')] for x in section_data if isinstance(x, dict)]
+                    yield Section(section_name, 'kv', ['Field', 'Value'], rows)
+                else:
+                    yield Section(section_name, 'list', None, [[x] for x in section_data])
+            elif isinstance(section_data, dict):
+                rows = [[_pretty(str(k)), '' if v is None else v] for k, v in section_data.items()]
+                yield Section(section_name, 'kv', ['Field', 'Value'], rows)
+    
+    def generate_excel_file(self, data: Dict[str, Any], base_filename: str, output_dir: Optional[str] = None,
+                            sections: Optional[List[Section]] = None) -> Dict[str, Any]:
         """Generate Excel with proper tables, key-value headers, and widths."""
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+        from openpyxl.utils import get_column_letter
         try:
-            wb = Workbook()
-            # remove default sheet; we'll add sheets as needed
-            default_ws = wb.active
-            wb.remove(default_ws)
-
-            def autosize(ws):
-                for col_idx in range(1, ws.max_column + 1):
-                    letter = get_column_letter(col_idx)
-                    max_len = 0
-                    for cell in ws.iter_rows(min_col=col_idx, max_col=col_idx, values_only=True):
-                        val = cell[0]
-                        if val is None:
-                            continue
-                        s = str(val)
-                        if len(s) > max_len:
-                            max_len = len(s)
-                    ws.column_dimensions[letter].width = min(max(10, max_len + 2), 60)
+            # Write-only workbook: rows stream straight to XML instead of living as Cell objects
+            wb = Workbook(write_only=True)
+            bold = Font(bold=True)
+
+            def write_sheet(title, lines, freeze_row=None):
+                """lines are (is_header, values); widths and panes must be set before the first append"""
+                ws = wb.create_sheet(title)
+                if len(lines) > 1:
+                    widths = {}
+                    for _is_header, values in lines:
+                        for col_idx, val in enumerate(values, 1):
+                            if val is not None:
+                                widths[col_idx] = max(widths.get(col_idx, 0), len(str(val)))
+                    for col_idx in range(1, max(widths, default=0) + 1):
+                        max_len = widths.get(col_idx, 0)
+                        ws.column_dimensions[get_column_letter(col_idx)].width = min(max(10, max_len + 2), 60)
+                if freeze_row:
+                    ws.freeze_panes = f'A{freeze_row}'
+                for is_header, values in lines:
+                    if is_header:
+                        cells = []
+                        for val in values:
+                            cell = WriteOnlyCell(ws, value=val)
+                            cell.font = bold
+                            cells.append(cell)
+                        ws.append(cells)
+                    else:
+                        ws.append(values)
 
             # 1) Direct support for LLM "tables" schema
-            if isinstance(data, dict) and isinstance(data.get('tables'), list) and data['tables']:
+            if _has_tables(data):
                 for tbl in data['tables']:
                     title = (tbl.get('name') or 'Sheet')[:31]
-                    ws = wb.create_sheet(title)
                     headers = tbl.get('headers') or []
                     rows = tbl.get('rows') or []
-                    if headers:
-                        ws.append(headers)
-                        for i in range(1, len(headers) + 1):
-                            ws.cell(row=1, column=i).font = Font(bold=True)
-                        ws.freeze_panes = 'A2'
-                    for r in rows:
-                        ws.append(["" if v is None else v for v in r])
-                    autosize(ws)
+                    lines = [(True, headers)] if headers else []
+                    lines.extend((False, ["" if v is None else v for v in r]) for r in rows)
+                    # Header-only or empty sheets keep default widths
+                    write_sheet(title, lines, freeze_row=2 if headers and rows else None)
 
             # 2) Fallback: iterate other sections
             else:
-                ws = wb.create_sheet('Data')
-                row = 1
-                for section_name, section_data in data.items():
-                    if not section_data or section_name == 'metadata':
-                        continue
-                    # tabular list of dicts (with or without id)
-                    if isinstance(section_data, list) and section_data and isinstance(section_data[0], dict):
-                        headers = [k for k in section_data[0].keys() if k != 'id'] or list(section_data[0].keys())
-                        ws.append(headers)
-                        for i in range(1, len(headers) + 1):
-                            ws.cell(row=row, column=i).font = Font(bold=True)
-                        ws.freeze_panes = f'A{row+1}'
-                        row += 1
-                        for item in section_data:
-                            ws.append([str(item.get(h, '')) for h in headers])
-                            row += 1
-                    elif isinstance(section_data, list):
-                        # list of primitives or dicts with field/value
-                        # ensure headers Field/Value when dicts present
-                        has_kv = any(isinstance(x, dict) and ('field' in x or 'value' in x) for x in section_data)
-                        if has_kv:
-                            ws.append(['Field', 'Value'])
-                            ws.cell(row=row, column=1).font = Font(bold=True)
-                            ws.cell(row=row, column=2).font = Font(bold=True)
-                            ws.freeze_panes = f'A{row+1}'
-                            row += 1
-                            for x in section_data:
-                                if isinstance(x, dict):
-                                    ws.append([str(x.get('field', '')), str(x.get('value', ''))])
-                                    row += 1
-                        else:
-                            for x in section_data:
-                                ws.cell(row=row, column=1, value=str(x))
-                                row += 1
-                    elif isinstance(section_data, dict):
-                        # two-column key:value
-                        ws.append(['Field', 'Value'])
-                        ws.cell(row=row, column=1).font = Font(bold=True)
-                        ws.cell(row=row, column=2).font = Font(bold=True)
-                        ws.freeze_panes = f'A{row+1}'
-                        row += 1
-                        for k, v in section_data.items():
-                            ws.append([str(k).title().replace('_', ' '), '' if v is None else str(v)])
-                            row += 1
-                autosize(ws)
-
-            output_path = os.path.join(self.temp_dir, f"{base_filename}.xlsx")
-            wb.save(output_path)
-            return {'success': True, 'path': output_path, 'filename': os.path.basename(output_path)}
+                if sections is None:
+                    sections = self._iter_sections(data)
+                lines = []
+                freeze_row = None
+                for _name, kind, headers, rows in sections:
+                    if headers:
+                        lines.append((True, headers))
+                        freeze_row = len(lines) + 1
+                    lines.extend((False, [_excel_value(v) for v in r]) for r in rows)
+                write_sheet('Data', lines, freeze_row)
+
+            output_path = os.path.join(output_dir or self.temp_dir, f"{base_filename}.xlsx")
+            # Take the size from the open handle instead of stat()ing the finished file
+            with open(output_path, 'wb') as fh:
+                wb.save(fh)
+                size = fh.tell()
+            return {
+                'success': True,
+                'path': output_path,
+                'filename': os.path.basename(output_path),
+                'size': size
+            }
         except Exception as e:
             return ErrorHandler.error(f'Excel generation failed: {str(e)}')
     
-    def generate_pdf_file(self, data: Dict[str, Any], base_filename: str) -> Dict[str, Any]:
+    def generate_pdf_file(self, data: Dict[str, Any], base_filename: str, output_dir: Optional[str] = None,
+                          sections: Optional[List[Section]] = None) -> Dict[str, Any]:
         """Generate PDF with headers and proper tables when available."""
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
         try:
-            output_path = os.path.join(self.temp_dir, f"{base_filename}.pdf")
-            doc = SimpleDocTemplate(output_path, pagesize=letter)
-            styles = getSampleStyleSheet()
+            output_path = os.path.join(output_dir or self.temp_dir, f"{base_filename}.pdf")
+            styles = _pdf_styles()
             story = []
 
             def table_with_header(headers, rows):
-                tbl = Table([headers] + rows)
+                tbl = Table([headers, *rows])
                 tbl.setStyle(TableStyle([
                     ('GRID', (0,0), (-1,-1), 0.5, colors.black),
                     ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
@@ -921,7 +1273,7 @@ class FileGenerationService:
                 return tbl
 
             # 1) Direct support for LLM "tables" schema
-            if isinstance(data, dict) and isinstance(data.get('tables'), list) and data['tables']:
+            if _has_tables(data):
                 for tbl in data['tables']:
                     headers = tbl.get('headers') or []
                     rows = [["" if v is None else str(v) for v in r] for r in (tbl.get('rows') or [])]
@@ -930,90 +1282,86 @@ class FileGenerationService:
                         story.append(Spacer(1, 12))
             else:
                 # Fallback: render sections
-                for section_name, section_data in data.items():
-                    if not section_data or section_name == 'metadata':
-                        continue
-                    if isinstance(section_data, list) and section_data and isinstance(section_data[0], dict):
-                        headers = [k for k in section_data[0].keys() if k != 'id'] or list(section_data[0].keys())
-                        rows = [[str(item.get(h, '')) for h in headers] for item in section_data]
-                        story.append(table_with_header(headers, rows))
-                        story.append(Spacer(1, 12))
-                    elif isinstance(section_data, list):
-                        has_kv = any(isinstance(x, dict) and ('field' in x or 'value' in x) for x in section_data)
-                        if has_kv:
-                            headers = ['Field', 'Value']
-                            rows = [[str(x.get('field', '')), str(x.get('value', ''))] for x in section_data if isinstance(x, dict)]
-                            story.append(table_with_header(headers, rows))
-                            story.append(Spacer(1, 12))
-                        else:
-                            for x in section_data:
-                                story.append(Paragraph(str(x), styles['Normal']))
-                    elif isinstance(section_data, dict):
-                        headers = ['Field', 'Value']
-                        rows = [[str(k).title().replace('_', ' '), '' if v is None else str(v)] for k, v in section_data.items()]
-                        story.append(table_with_header(headers, rows))
+                if sections is None:
+                    sections = self._iter_sections(data)
+                for _name, kind, headers, rows in sections:
+                    if kind == 'list':
+                        for r in rows:
+                            story.append(Paragraph(str(r[0]), styles['Normal']))
+                    else:
+                        story.append(table_with_header(headers, [[str(v) for v in r] for r in rows]))
                         story.append(Spacer(1, 12))
 
-            doc.build(story)
-            return {'success': True, 'path': output_path, 'filename': os.path.basename(output_path)}
+            with open(output_path, 'wb') as fh:
+                SimpleDocTemplate(fh, pagesize=letter).build(story)
+                size = fh.tell()
+            return {
+                'success': True,
+                'path': output_path,
+                'filename': os.path.basename(output_path),
+                'size': size
+            }
         except Exception as e:
             return ErrorHandler.error(f'PDF generation failed: {str(e)}')
     
-    def generate_doc_file(self, data: Dict[str, Any], base_filename: str) -> Dict[str, Any]:
+    def generate_doc_file(self, data: Dict[str, Any], base_filename: str, output_dir: Optional[str] = None,
+                          sections: Optional[List[Section]] = None) -> Dict[str, Any]:
         """Generate DOC file with raw data only"""
+        from docx import Document
         try:
-            output_path = os.path.join(self.temp_dir, f"{base_filename}.docx")
-            doc = Document()
+            output_path = os.path.join(output_dir or self.temp_dir, f"{base_filename}.docx")
+            doc = Document(io.BytesIO(_docx_template()))
+            if sections is None:
+                sections = self._iter_sections(data)
             
             # Add sections without titles - just raw data
-            for section_name, section_data in data.items():
-                if not section_data or section_name == 'metadata':
-                    continue
-                
-                if isinstance(section_data, list):
-                    # Check if this is tabular data
-                    if section_data and isinstance(section_data[0], dict) and 'id' in section_data[0]:
-                        # Create table with just data, no headers
-                        first_item = section_data[0]
-                        headers = [key for key in first_item.keys() if key != 'id']
-                        
-                        table = doc.add_table(rows=0, cols=len(headers))
-                        
-                        for item in section_data:
-                            if isinstance(item, dict):
-                                row_cells = table.add_row().cells
-                                for i, header in enumerate(headers):
-                                    value = item.get(header, '')
-                                    row_cells[i].text = str(value) if value is not None else ''
-                    else:
-                        # Just raw values without field names
-                        for item in section_data:
-                            if isinstance(item, dict):
-                                value = item.get('value', '')
-                                if value:
-                                    doc.add_paragraph(str(value))
-                elif isinstance(section_data, dict):
-                    # Just raw values
-                    for key, value in section_data.items():
-                        if value:
-                            doc.add_paragraph(str(value))
+            for _name, kind, headers, rows in sections:
+                if kind == 'records':
+                    # Create table with just data, no headers
+                    # Allocate all rows up front instead of growing the table per item
+                    table = doc.add_table(rows=len(rows), cols=len(headers))
+                    for table_row, values in zip(table.rows, rows):
+                        row_cells = table_row.cells
+                        for i, value in enumerate(values):
+                            row_cells[i].text = str(value) if value is not None else ''
+                elif kind == 'kv':
+                    # Just raw values without field names
+                    self._append_paragraphs(doc, [str(value) for _field, value in rows if value])
+                elif kind == 'table' and 'value' in headers:
+                    idx = headers.index('value')
+                    self._append_paragraphs(doc, [str(r[idx]) for r in rows if r[idx]])
             
-            doc.save(output_path)
+            with open(output_path, 'wb') as fh:
+                doc.save(fh)
+                size = fh.tell()
             
             return {
                 'success': True,
                 'path': output_path,
-                'filename': os.path.basename(output_path)
+                'filename': os.path.basename(output_path),
+                'size': size
             }
         except Exception as e:
             return ErrorHandler.error(f'DOC generation failed: {str(e)}')
     
-    def cleanup_temp_files(self, file_paths: List[str]):
-        """Clean up temporary files"""
-        for file_path in file_paths:
-            try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            except Exception:
-                pass
+    def _append_paragraphs(self, doc, texts: List[str]):
+        """Append one paragraph per text to the document body in a single splice"""
+        if not texts:
+            return
+        from docx.oxml import OxmlElement
+        paragraphs = []
+        for text in texts:
+            p = OxmlElement('w:p')
+            # CT_R.text handles tabs/line breaks the same way Run.text does
+            p.add_r().text = text
+            paragraphs.append(p)
+        body = doc.element.body
+        sect_pr = body.sectPr
+        pos = body.index(sect_pr) if sect_pr is not None else len(body)
+        body[pos:pos] = paragraphs
+    
+    def cleanup_temp_files(self, dirs: List[str]):
+        """Remove per-run output directories returned by generate_all_formats"""
+        for d in dirs:
+            shutil.rmtree(d, ignore_errors=True)
 
@@ -1,23 +1,33 @@
 import os
-import uuid
+import hashlib
+import functools
 from datetime import datetime, timedelta
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
 from supabase import create_client, Client
 import logging
+import threading
 import pytesseract
-from PIL import Image, ImageEnhance, ImageFilter
-import io
+from PIL import Image, ImageFilter
 import fitz  # PyMuPDF for PDF processing
 import json
 import re
 import time
-from typing import Dict, Any, Optional, List
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Any, Optional, List, Tuple
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 import openai
-import google.generativeai as genai
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # File generation imports
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 from reportlab.lib.pagesizes import letter, A4
@@ -30,16 +40,137 @@ from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
 
+from .services import _cached_probe, _get_gemini
+
+try:
+    # orjson decodes LLM JSON several times faster; its errors subclass json.JSONDecodeError
+    import orjson
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover
+    orjson = None
+    json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=256)
+def _pretty(key: str) -> str:
+    """Convert a snake_case field name to Title Case (cached per unique key)"""
+    return key.replace('_', ' ').title()
+
+
+try:
+    # C parser; handles the 'Z' suffix without a string copy
+    from ciso8601 import parse_datetime as _parse_iso
+except ImportError:
+    # Python 3.11+ fromisoformat is C-implemented and accepts 'Z' as well
+    _parse_iso = datetime.fromisoformat
+
+
+def _timestamp_key(value) -> str:
+    """
+    Reduce a storage timestamp to a sortable 'YYYY-MM-DDTHH:MM:SS' string
+    
+    Supabase returns ISO-8601 strings, so the common case is a slice with no
+    datetime parsing. The UTC offset is ignored, as the old naive comparison did.
+    
+    Args:
+        value: ISO timestamp string or datetime
+        
+    Returns:
+        str: Second-resolution key comparable with datetime.isoformat(timespec='seconds')
+    """
+    if isinstance(value, str):
+        if len(value) >= 19 and value[4] == '-' and value[7] == '-' and value[10] in 'T ':
+            return f"{value[:10]}T{value[11:19]}"
+        value = _parse_iso(value)
+    return value.replace(tzinfo=None).isoformat(timespec='seconds')
+
+
+# Keep-alive connection pool for direct Storage REST calls; urllib3 retries
+# connection errors and 502/503/504 with exponential backoff. POST is retried
+# too: uploads go to content-addressed paths with x-upsert, so replaying one
+# the server already committed rewrites the same bytes instead of failing
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {'POST'},
+        raise_on_status=False
+    )
+))
+
+def _file_ext(name: str) -> str:
+    """Lowercased extension of a bucket-relative name; same result as os.path.splitext for names without slashes"""
+    i = name.rfind('.')
+    return name[i:].lower() if i > 0 and name[:i].lstrip('.') else ''
+
+
+def _created_before(value, cutoff_key: str) -> bool:
+    """True if a storage timestamp is older than cutoff_key; missing or unparseable counts as not old"""
+    if not value:
+        return False
+    try:
+        return _timestamp_key(value) < cutoff_key
+    except (ValueError, TypeError, AttributeError):
+        return False
+
+
+_TIMESTAMP_CACHE = (0.0, '')
+
+
+def _response_timestamp() -> str:
+    """ISO timestamp for response dicts, reformatted at most every 100 ms"""
+    global _TIMESTAMP_CACHE
+    checked_at, stamp = _TIMESTAMP_CACHE
+    now = time.monotonic()
+    if now - checked_at > 0.1 or not stamp:
+        stamp = datetime.now().isoformat()
+        _TIMESTAMP_CACHE = (now, stamp)
+    return stamp
+
+
+# Suggestion tuples repeated across error payloads, shared by reference
+_SUGG_NETWORK = ('Check your internet connection', 'Try again in a few minutes')
+_SUGG_NETWORK_OR_SUPPORT = _SUGG_NETWORK + ('Contact support if problem persists',)
+_SUGG_RETRY_OR_SUPPORT = ('Try again in a few minutes', 'Contact support if problem persists')
+_SUGG_AI_RETRY = ('Try again in a few minutes', 'Try processing a different document',
+                  'Contact support if problem persists')
+
+# Exception message classification for ErrorHandler.get_user_friendly_error
+_ERROR_CATEGORY_RE = re.compile(
+    r'(?P<network>connection|network|timeout|unreachable)'
+    r'|(?P<access>permission|unauthorized|forbidden|access denied)'
+    r'|(?P<file>file not found|no such file|cannot open)'
+    r'|(?P<resources>memory|out of space|disk full)',
+    re.IGNORECASE
+)
+_ERROR_CATEGORY_PRIORITY = ('network', 'access', 'file', 'resources')
+_ERROR_CATEGORY_RESPONSES = {
+    'network': ('Connection failed', 'Could not connect to the service',
+                _SUGG_NETWORK, True),
+    'access': ('Access denied', 'Insufficient permissions to perform this operation',
+               ('Contact system administrator', 'Check your account permissions'), False),
+    'file': ('File not found', 'The requested file could not be found',
+             ('Check that the file exists', 'Try uploading the file again'), True),
+    'resources': ('System resources unavailable', 'Not enough system resources to complete the operation',
+                  ('Try processing a smaller file', 'Try again later', 'Contact administrator'), True),
+    'generic': ('Processing failed', 'An unexpected error occurred',
+                _SUGG_RETRY_OR_SUPPORT, True),
+}
+
+
 class ErrorHandler:
     """Centralized error handling and user feedback utility"""
     
     @staticmethod
     def format_error_response(error_type: str, message: str, details: str = None, 
                             suggestions: List[str] = None, retry_allowed: bool = True,
-                            fallback_suggestion: str = None) -> Dict[str, Any]:
+                            fallback_suggestion: str = None, timestamp: str = None) -> Dict[str, Any]:
         """
         Format a standardized error response
         
@@ -50,6 +181,7 @@ class ErrorHandler:
             suggestions: List of actionable suggestions for the user
             retry_allowed: Whether the user should be allowed to retry
             fallback_suggestion: Alternative approach if main method fails
+            timestamp: Precomputed ISO timestamp to share across a batch of responses
             
         Returns:
             dict: Standardized error response
@@ -59,7 +191,7 @@ class ErrorHandler:
             'error': error_type,
             'message': message,
             'retry_allowed': retry_allowed,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': timestamp or _response_timestamp()
         }
         
         if details:
@@ -81,7 +213,7 @@ class ErrorHandler:
         Args:
             message: Success message
             data: Response data
-            **kwargs: Additional response fields
+            **kwargs: Additional response fields; 'timestamp' overrides the generated one
             
         Returns:
             dict: Standardized success response
@@ -89,7 +221,7 @@ class ErrorHandler:
         response = {
             'success': True,
             'message': message,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': kwargs.pop('timestamp', None) or _response_timestamp()
         }
         
         if data is not None:
@@ -109,70 +241,133 @@ class ErrorHandler:
         Returns:
             dict: User-friendly error response
         """
-        error_msg = str(exception).lower()
-        
-        # Network-related errors
-        if any(term in error_msg for term in ['connection', 'network', 'timeout', 'unreachable']):
-            return ErrorHandler.format_error_response(
-                'Connection failed',
-                'Could not connect to the service',
-                str(exception),
-                ['Check your internet connection', 'Try again in a few minutes'],
-                retry_allowed=True
-            )
+        error_msg = str(exception)
         
-        # Permission/authentication errors
-        if any(term in error_msg for term in ['permission', 'unauthorized', 'forbidden', 'access denied']):
-            return ErrorHandler.format_error_response(
-                'Access denied',
-                'Insufficient permissions to perform this operation',
-                str(exception),
-                ['Contact system administrator', 'Check your account permissions'],
-                retry_allowed=False
-            )
-        
-        # File-related errors
-        if any(term in error_msg for term in ['file not found', 'no such file', 'cannot open']):
-            return ErrorHandler.format_error_response(
-                'File not found',
-                'The requested file could not be found',
-                str(exception),
-                ['Check that the file exists', 'Try uploading the file again'],
-                retry_allowed=True
-            )
-        
-        # Memory/resource errors
-        if any(term in error_msg for term in ['memory', 'out of space', 'disk full']):
-            return ErrorHandler.format_error_response(
-                'System resources unavailable',
-                'Not enough system resources to complete the operation',
-                str(exception),
-                ['Try processing a smaller file', 'Try again later', 'Contact administrator'],
-                retry_allowed=True
-            )
+        # One regex scan finds every matching category; the first in priority order wins
+        categories = {match.lastgroup for match in _ERROR_CATEGORY_RE.finditer(error_msg)}
+        for category in _ERROR_CATEGORY_PRIORITY:
+            if category in categories:
+                error_type, message, suggestions, retry_allowed = _ERROR_CATEGORY_RESPONSES[category]
+                break
+        else:
+            error_type, message, suggestions, retry_allowed = _ERROR_CATEGORY_RESPONSES['generic']
         
-        # Generic error
         return ErrorHandler.format_error_response(
-            'Processing failed',
-            'An unexpected error occurred',
-            str(exception),
-            ['Try again in a few minutes', 'Contact support if problem persists'],
-            retry_allowed=True
+            error_type,
+            message,
+            error_msg,
+            list(suggestions),
+            retry_allowed=retry_allowed
         )
 
 
+@dataclass(frozen=True, slots=True)
+class ErrorTemplate:
+    """Immutable error payload; to_dict() produces the plain dict used at the API boundary"""
+    error: str
+    details: Optional[str] = None
+    suggestions: Tuple[str, ...] = ()
+    retry_allowed: bool = True
+    
+    def to_dict(self, details: Optional[str] = None) -> Dict[str, Any]:
+        """Build the response dict, optionally overriding details for this occurrence"""
+        return {
+            'success': False,
+            'error': self.error,
+            'details': details if details is not None else self.details,
+            'suggestions': list(self.suggestions),
+            'retry_allowed': self.retry_allowed
+        }
+
+
+# Upload error payloads shared by every call instead of rebuilt per response
+_UPLOAD_ERR_STORAGE_SERVICE_UNAVAILABLE = ErrorTemplate(
+    'Storage service unavailable',
+    details='Database connection could not be established',
+    suggestions=('Check your internet connection', 'Try again in a few moments')
+)
+_UPLOAD_ERR_INVALID_FILE_PROVIDED = ErrorTemplate(
+    'Invalid file provided',
+    details='File object is missing or corrupted',
+    suggestions=('Please select a valid file', 'Try uploading a different file')
+)
+_UPLOAD_ERR_FILE_TOO_LARGE = ErrorTemplate(
+    'File too large',
+    suggestions=('Compress your file', 'Use a smaller image resolution', 'Split large documents'),
+    retry_allowed=False
+)
+_UPLOAD_ERR_EMPTY_FILE = ErrorTemplate(
+    'Empty file',
+    details='The uploaded file appears to be empty',
+    suggestions=('Check that your file contains data', 'Try uploading a different file')
+)
+_UPLOAD_ERR_FILE_READ_ERROR = ErrorTemplate(
+    'File read error',
+    suggestions=('The file may be corrupted', 'Try uploading a different file')
+)
+_UPLOAD_ERR_CONNECTION_FAILED = ErrorTemplate(
+    'Connection failed',
+    details='Could not connect to storage service',
+    suggestions=_SUGG_NETWORK
+)
+_UPLOAD_ERR_UPLOAD_TIMEOUT = ErrorTemplate(
+    'Upload timeout',
+    details='The upload took too long to complete',
+    suggestions=('Check your internet connection', 'Try uploading a smaller file', 'Try again later')
+)
+_UPLOAD_ERR_UPLOAD_FAILED_AFTER_MULTIPLE_ATTEMPTS = ErrorTemplate(
+    'Upload failed after multiple attempts',
+    suggestions=_SUGG_NETWORK_OR_SUPPORT
+)
+_UPLOAD_ERR_STORAGE_ACCESS_DENIED = ErrorTemplate(
+    'Storage access denied',
+    details='Insufficient permissions to upload files',
+    suggestions=('Contact system administrator', 'Check service configuration'),
+    retry_allowed=False
+)
+_UPLOAD_ERR_NETWORK_ERROR = ErrorTemplate(
+    'Network error',
+    details='Could not connect to storage service',
+    suggestions=_SUGG_NETWORK
+)
+_UPLOAD_ERR_STORAGE_SERVICE_ERROR = ErrorTemplate(
+    'Storage service error',
+    suggestions=_SUGG_RETRY_OR_SUPPORT
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_supabase() -> Client:
+    """
+    Create the Supabase client once per process
+    
+    Every service construction used to build its own client and HTTP pool.
+    Failures are not cached, so a later construction retries.
+    
+    Returns:
+        Client: Shared Supabase client
+    """
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+
+
+def reset_supabase():
+    """Drop the shared Supabase client (for tests or after credential changes)"""
+    _get_supabase.cache_clear()
+
+
 class SupabaseStorageService:
     """Service for handling file uploads to Supabase Storage"""
     
+    _OUTPUT_EXTS = frozenset(('.xlsx', '.pdf', '.docx'))
+    
     def __init__(self):
+        # prefix -> (5s tick, {name: listing entry}); see _indexed_list
+        self._listing_cache = {}
         try:
-            self.supabase: Client = create_client(
-                settings.SUPABASE_URL,
-                settings.SUPABASE_KEY
-            )
+            self.supabase: Client = _get_supabase()
             self.bucket_name = "document-uploads"
         except Exception as e:
-            logger.error(f"Failed to initialize Supabase client: {str(e)}")
+            logger.error("Failed to initialize Supabase client: %s", e)
             self.supabase = None
     
     def upload_file(self, file, session_key):
@@ -187,166 +382,129 @@ class SupabaseStorageService:
             dict: Contains file_path and public_url with detailed error info
         """
         if not self.supabase:
-            return {
-                'success': False,
-                'error': 'Storage service unavailable',
-                'details': 'Database connection could not be established',
-                'suggestions': ['Check your internet connection', 'Try again in a few moments'],
-                'retry_allowed': True
-            }
+            return _UPLOAD_ERR_STORAGE_SERVICE_UNAVAILABLE.to_dict()
         
         try:
             # Validate file
             if not file or not hasattr(file, 'read'):
-                return {
-                    'success': False,
-                    'error': 'Invalid file provided',
-                    'details': 'File object is missing or corrupted',
-                    'suggestions': ['Please select a valid file', 'Try uploading a different file'],
-                    'retry_allowed': True
-                }
+                return _UPLOAD_ERR_INVALID_FILE_PROVIDED.to_dict()
             
             # Check file size
             if file.size > 10 * 1024 * 1024:  # 10MB
-                return {
-                    'success': False,
-                    'error': 'File too large',
-                    'details': f'File size is {file.size / (1024*1024):.1f}MB, maximum allowed is 10MB',
-                    'suggestions': ['Compress your file', 'Use a smaller image resolution', 'Split large documents'],
-                    'retry_allowed': False
-                }
+                return _UPLOAD_ERR_FILE_TOO_LARGE.to_dict(f'File size is {file.size / (1024*1024):.1f}MB, maximum allowed is 10MB')
             
-            # Generate unique filename
             file_extension = os.path.splitext(file.name)[1]
             if not file_extension:
                 file_extension = '.tmp'
-            unique_filename = f"{session_key}/{uuid.uuid4()}{file_extension}"
             
-            # Read file content with error handling
+            # Check the file and hash it chunk by chunk; the body is streamed below
             try:
                 file.seek(0)  # Reset file pointer
-                file_content = file.read()
-                if not file_content:
-                    return {
-                        'success': False,
-                        'error': 'Empty file',
-                        'details': 'The uploaded file appears to be empty',
-                        'suggestions': ['Check that your file contains data', 'Try uploading a different file'],
-                        'retry_allowed': True
-                    }
+                if not file.size:
+                    return _UPLOAD_ERR_EMPTY_FILE.to_dict()
+                hasher = hashlib.blake2b(digest_size=16)
+                for chunk in file.chunks():
+                    hasher.update(chunk)
+                digest = hasher.hexdigest()
+                file.seek(0)
             except Exception as read_error:
+                return _UPLOAD_ERR_FILE_READ_ERROR.to_dict(f'Could not read file content: {str(read_error)}')
+            
+            # Content-addressed name: identical bytes in a session map to the same object,
+            # so re-uploading a duplicate just upserts it without a separate lookup
+            unique_filename = f"{session_key}/{digest}{file_extension}"
+            
+            # Upload to Supabase Storage; the pooled session retries transient failures with backoff
+            try:
+                response = self._stream_upload(
+                    unique_filename,
+                    file,
+                    file.content_type or 'application/octet-stream'
+                )
+            except requests.exceptions.ConnectionError:
+                return _UPLOAD_ERR_CONNECTION_FAILED.to_dict()
+            except requests.exceptions.Timeout:
+                return _UPLOAD_ERR_UPLOAD_TIMEOUT.to_dict()
+            
+            if response.status_code != 200:
+                logger.error("Supabase upload failed after retries: %s %.200s", response.status_code, response.text)
+                return _UPLOAD_ERR_UPLOAD_FAILED_AFTER_MULTIPLE_ATTEMPTS.to_dict(f'Server responded with status {response.status_code}')
+            
+            # Get public URL
+            try:
+                public_url = self.supabase.storage.from_(self.bucket_name).get_public_url(unique_filename)
                 return {
-                    'success': False,
-                    'error': 'File read error',
-                    'details': f'Could not read file content: {str(read_error)}',
-                    'suggestions': ['The file may be corrupted', 'Try uploading a different file'],
-                    'retry_allowed': True
+                    'success': True,
+                    'file_path': unique_filename,
+                    'public_url': public_url,
+                    'message': 'File uploaded successfully'
+                }
+            except Exception as url_error:
+                logger.warning("Could not get public URL: %s", url_error)
+                return {
+                    'success': True,
+                    'file_path': unique_filename,
+                    'public_url': None,
+                    'message': 'File uploaded successfully (URL generation failed)'
                 }
-            
-            # Upload to Supabase Storage with retry logic
-            max_retries = 2
-            for attempt in range(max_retries + 1):
-                try:
-                    response = self.supabase.storage.from_(self.bucket_name).upload(
-                        path=unique_filename,
-                        file=file_content,
-                        file_options={
-                            "content-type": file.content_type or 'application/octet-stream',
-                            "cache-control": "3600"
-                        }
-                    )
-                    
-                    if response.status_code == 200:
-                        # Get public URL
-                        try:
-                            public_url = self.supabase.storage.from_(self.bucket_name).get_public_url(unique_filename)
-                            return {
-                                'success': True,
-                                'file_path': unique_filename,
-                                'public_url': public_url,
-                                'message': 'File uploaded successfully',
-                                'attempt': attempt + 1
-                            }
-                        except Exception as url_error:
-                            logger.warning(f"Could not get public URL: {str(url_error)}")
-                            return {
-                                'success': True,
-                                'file_path': unique_filename,
-                                'public_url': None,
-                                'message': 'File uploaded successfully (URL generation failed)',
-                                'attempt': attempt + 1
-                            }
-                    else:
-                        if attempt < max_retries:
-                            logger.warning(f"Upload attempt {attempt + 1} failed, retrying...")
-                            time.sleep(1)  # Brief delay before retry
-                            continue
-                        else:
-                            logger.error(f"Supabase upload failed after {max_retries + 1} attempts: {response}")
-                            return {
-                                'success': False,
-                                'error': 'Upload failed after multiple attempts',
-                                'details': f'Server responded with status {response.status_code}',
-                                'suggestions': ['Check your internet connection', 'Try again in a few minutes', 'Contact support if problem persists'],
-                                'retry_allowed': True
-                            }
-                            
-                except requests.exceptions.ConnectionError:
-                    if attempt < max_retries:
-                        logger.warning(f"Connection error on attempt {attempt + 1}, retrying...")
-                        time.sleep(2)  # Longer delay for connection issues
-                        continue
-                    else:
-                        return {
-                            'success': False,
-                            'error': 'Connection failed',
-                            'details': 'Could not connect to storage service',
-                            'suggestions': ['Check your internet connection', 'Try again in a few minutes'],
-                            'retry_allowed': True
-                        }
-                except requests.exceptions.Timeout:
-                    if attempt < max_retries:
-                        logger.warning(f"Timeout on attempt {attempt + 1}, retrying...")
-                        time.sleep(2)
-                        continue
-                    else:
-                        return {
-                            'success': False,
-                            'error': 'Upload timeout',
-                            'details': 'The upload took too long to complete',
-                            'suggestions': ['Check your internet connection', 'Try uploading a smaller file', 'Try again later'],
-                            'retry_allowed': True
-                        }
                 
         except Exception as e:
-            logger.error(f"Unexpected error uploading file to Supabase: {str(e)}")
+            logger.error("Unexpected error uploading file to Supabase: %s", e)
             error_msg = str(e).lower()
             
             # Provide specific error messages for common issues
             if 'permission' in error_msg or 'unauthorized' in error_msg:
-                return {
-                    'success': False,
-                    'error': 'Storage access denied',
-                    'details': 'Insufficient permissions to upload files',
-                    'suggestions': ['Contact system administrator', 'Check service configuration'],
-                    'retry_allowed': False
-                }
+                return _UPLOAD_ERR_STORAGE_ACCESS_DENIED.to_dict()
             elif 'network' in error_msg or 'connection' in error_msg:
-                return {
-                    'success': False,
-                    'error': 'Network error',
-                    'details': 'Could not connect to storage service',
-                    'suggestions': ['Check your internet connection', 'Try again in a few minutes'],
-                    'retry_allowed': True
-                }
+                return _UPLOAD_ERR_NETWORK_ERROR.to_dict()
             else:
-                return {
-                    'success': False,
-                    'error': 'Storage service error',
-                    'details': str(e),
-                    'suggestions': ['Try again in a few minutes', 'Contact support if problem persists'],
-                    'retry_allowed': True
-                }
+                return _UPLOAD_ERR_STORAGE_SERVICE_ERROR.to_dict(str(e))
+    
+    def _has_any(self, prefix):
+        """
+        Cheap existence probe for a folder: list at most one entry
+        
+        Args:
+            prefix: Folder to probe
+            
+        Returns:
+            bool: False only when the folder is known to be empty
+        """
+        try:
+            return bool(self.supabase.storage.from_(self.bucket_name).list(prefix, {'limit': 1}))
+        except Exception as e:
+            logger.warning("Existence probe failed for %s: %s", prefix, e)
+            return True
+    
+    def _stream_upload(self, path, file, content_type):
+        """
+        PUT a file to the Storage REST endpoint, streaming it from the upload object
+        
+        supabase-py's upload() needs the whole body as bytes; requests reads the
+        Django UploadedFile in blocks instead, using its size for Content-Length.
+        The object is upserted: its path is derived from its content, so a retry of
+        an upload that already landed overwrites it with identical bytes.
+        
+        Args:
+            path: Object path inside the bucket
+            file: Django UploadedFile positioned at the start (urllib3 rewinds it on retry)
+            content_type: MIME type to store with the object
+            
+        Returns:
+            requests.Response: Raw response from the Storage API
+        """
+        return _HTTP_SESSION.post(
+            f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1/object/{self.bucket_name}/{path}",
+            data=file,
+            headers={
+                'Authorization': f'Bearer {settings.SUPABASE_KEY}',
+                'apikey': settings.SUPABASE_KEY,
+                'Content-Type': content_type,
+                'Cache-Control': 'max-age=3600',
+                'x-upsert': 'true',
+            },
+            timeout=60
+        )
     
     def delete_file(self, file_path):
         """
@@ -362,7 +520,7 @@ class SupabaseStorageService:
             response = self.supabase.storage.from_(self.bucket_name).remove([file_path])
             return response.status_code == 200
         except Exception as e:
-            logger.error(f"Error deleting file from Supabase: {str(e)}")
+            logger.error("Error deleting file from Supabase: %s", e)
             return False
     
     def cleanup_session_files(self, session_key):
@@ -382,12 +540,12 @@ class SupabaseStorageService:
             if response:
                 file_paths = [f"{session_key}/{file['name']}" for file in response]
                 if file_paths:
-                    delete_response = self.supabase.storage.from_(self.bucket_name).remove(file_paths)
-                    return delete_response.status_code == 200
+                    _deleted, errors = self._parallel_remove(file_paths)
+                    return not errors
             
             return True
         except Exception as e:
-            logger.error(f"Error cleaning up session files: {str(e)}")
+            logger.error("Error cleaning up session files: %s", e)
             return False
     
     def get_file_content(self, file_path):
@@ -404,7 +562,7 @@ class SupabaseStorageService:
             response = self.supabase.storage.from_(self.bucket_name).download(file_path)
             return response
         except Exception as e:
-            logger.error(f"Error downloading file from Supabase: {str(e)}")
+            logger.error("Error downloading file from Supabase: %s", e)
             return None
     
     def list_all_files(self, prefix=""):
@@ -424,7 +582,7 @@ class SupabaseStorageService:
             response = self.supabase.storage.from_(self.bucket_name).list(prefix)
             return response if response else []
         except Exception as e:
-            logger.error(f"Error listing files from Supabase: {str(e)}")
+            logger.error("Error listing files from Supabase: %s", e)
             return []
     
     def get_file_info(self, file_path):
@@ -441,35 +599,69 @@ class SupabaseStorageService:
             if not self.supabase:
                 return None
             
-            # Get file list to find the specific file
-            path_parts = file_path.split('/')
-            if len(path_parts) > 1:
-                prefix = '/'.join(path_parts[:-1])
-                filename = path_parts[-1]
-            else:
-                prefix = ""
-                filename = file_path
-            
-            files = self.list_all_files(prefix)
-            for file_info in files:
-                if file_info.get('name') == filename:
-                    return {
-                        'name': file_info.get('name'),
-                        'size': file_info.get('metadata', {}).get('size', 0),
-                        'last_modified': file_info.get('updated_at'),
-                        'created_at': file_info.get('created_at')
-                    }
+            prefix, _, filename = file_path.rpartition('/')
+            file_info = self._indexed_list(prefix).get(filename)
+            if file_info is not None:
+                return self._shape_file_info(file_info)
             return None
         except Exception as e:
-            logger.error(f"Error getting file info from Supabase: {str(e)}")
+            logger.error("Error getting file info from Supabase: %s", e)
             return None
     
-    def cleanup_old_files(self, hours_old=1):
+    def get_many_file_infos(self, file_paths):
+        """
+        Get file information for several paths, listing each prefix only once
+        
+        Args:
+            file_paths: Iterable of paths in storage
+            
+        Returns:
+            dict: Maps each path to its file information, or None if not found
+        """
+        results = {}
+        if not self.supabase:
+            return dict.fromkeys(file_paths)
+        
+        for file_path in file_paths:
+            prefix, _, filename = file_path.rpartition('/')
+            file_info = self._indexed_list(prefix).get(filename)
+            results[file_path] = self._shape_file_info(file_info) if file_info is not None else None
+        return results
+    
+    def _indexed_list(self, prefix):
+        """
+        List a prefix once per ~5 seconds and index the entries by name
+        
+        Args:
+            prefix: Folder prefix to list
+            
+        Returns:
+            dict: Maps file name to its raw listing entry
+        """
+        tick = int(time.monotonic() // 5)
+        cached = self._listing_cache.get(prefix)
+        if cached is None or cached[0] != tick:
+            cached = (tick, {f.get('name'): f for f in self.list_all_files(prefix)})
+            self._listing_cache[prefix] = cached
+        return cached[1]
+    
+    @staticmethod
+    def _shape_file_info(file_info):
+        """Reduce a raw listing entry to the fields callers use"""
+        return {
+            'name': file_info.get('name'),
+            'size': file_info.get('metadata', {}).get('size', 0),
+            'last_modified': file_info.get('updated_at'),
+            'created_at': file_info.get('created_at')
+        }
+    
+    def cleanup_old_files(self, hours_old=1, max_files=10000):
         """
         Clean up files older than specified hours
         
         Args:
             hours_old: Number of hours after which files should be cleaned up
+            max_files: Cap on files deleted per run so delete batches stay bounded
             
         Returns:
             dict: Cleanup results with counts and errors
@@ -484,55 +676,44 @@ class SupabaseStorageService:
                 }
             
             cutoff_time = datetime.now() - timedelta(hours=hours_old)
+            cutoff_key = cutoff_time.isoformat(timespec='seconds')
             files_to_delete = []
             errors = []
+            files_checked = 0
             
-            # Get all files in storage
-            all_files = self.list_all_files()
-            
-            for file_info in all_files:
+            # Page through the oldest files first; stop at the first one newer than the cutoff
+            for file_info in self._iter_files_oldest_first():
+                files_checked += 1
                 try:
-                    # Check if file is old enough to delete
                     file_created = file_info.get('created_at')
-                    if file_created:
-                        # Parse the timestamp (assuming ISO format)
-                        if isinstance(file_created, str):
-                            file_date = datetime.fromisoformat(file_created.replace('Z', '+00:00'))
-                        else:
-                            file_date = file_created
-                        
-                        # Convert to naive datetime for comparison
-                        if file_date.tzinfo:
-                            file_date = file_date.replace(tzinfo=None)
-                        
-                        if file_date < cutoff_time:
-                            files_to_delete.append(file_info.get('name'))
+                    if not file_created:
+                        continue
+                    if _timestamp_key(file_created) >= cutoff_key:
+                        break
+                    files_to_delete.append(file_info.get('name'))
+                    if len(files_to_delete) >= max_files:
+                        break
                 except Exception as e:
                     errors.append(f"Error processing file {file_info.get('name', 'unknown')}: {str(e)}")
             
             # Delete old files
             deleted_count = 0
             if files_to_delete:
-                try:
-                    delete_response = self.supabase.storage.from_(self.bucket_name).remove(files_to_delete)
-                    if delete_response.status_code == 200:
-                        deleted_count = len(files_to_delete)
-                        logger.info(f"Successfully deleted {deleted_count} old files")
-                    else:
-                        errors.append(f"Failed to delete files: {delete_response}")
-                except Exception as e:
-                    errors.append(f"Error deleting files: {str(e)}")
+                deleted_count, delete_errors = self._parallel_remove(files_to_delete)
+                errors.extend(delete_errors)
+                if deleted_count:
+                    logger.info("Successfully deleted %s old files", deleted_count)
             
             return {
                 'success': len(errors) == 0,
                 'files_deleted': deleted_count,
-                'files_checked': len(all_files),
+                'files_checked': files_checked,
                 'errors': errors,
                 'cutoff_time': cutoff_time.isoformat()
             }
             
         except Exception as e:
-            logger.error(f"Error during file cleanup: {str(e)}")
+            logger.error("Error during file cleanup: %s", e)
             return {
                 'success': False,
                 'error': str(e),
@@ -540,6 +721,30 @@ class SupabaseStorageService:
                 'errors': [str(e)]
             }
     
+    def _iter_files_oldest_first(self, prefix="", page_size=1000):
+        """
+        Yield storage entries sorted by created_at ascending, one page at a time
+        
+        Args:
+            prefix: Folder prefix to list
+            page_size: Entries requested per list call
+            
+        Yields:
+            dict: Raw listing entries, oldest first
+        """
+        bucket = self.supabase.storage.from_(self.bucket_name)
+        offset = 0
+        while True:
+            page = bucket.list(prefix, {
+                'limit': page_size,
+                'offset': offset,
+                'sortBy': {'column': 'created_at', 'order': 'asc'}
+            }) or []
+            yield from page
+            if len(page) < page_size:
+                return
+            offset += page_size
+    
     def cleanup_session_files_advanced(self, session_key, include_outputs=True):
         """
         Advanced cleanup for session files with detailed reporting
@@ -559,6 +764,16 @@ class SupabaseStorageService:
                     'files_deleted': 0
                 }
             
+            # Most sessions are already empty by the time cleanup fans out to them
+            if not self._has_any(session_key):
+                return {
+                    'success': True,
+                    'session_key': session_key,
+                    'files_deleted': 0,
+                    'files_found': 0,
+                    'errors': []
+                }
+            
             # List all files in the session folder
             session_files = self.list_all_files(session_key)
             files_to_delete = []
@@ -576,15 +791,9 @@ class SupabaseStorageService:
             errors = []
             
             if files_to_delete:
-                try:
-                    delete_response = self.supabase.storage.from_(self.bucket_name).remove(files_to_delete)
-                    if delete_response.status_code == 200:
-                        deleted_count = len(files_to_delete)
-                        logger.info(f"Successfully deleted {deleted_count} files for session {session_key}")
-                    else:
-                        errors.append(f"Failed to delete session files: {delete_response}")
-                except Exception as e:
-                    errors.append(f"Error deleting session files: {str(e)}")
+                deleted_count, errors = self._parallel_remove(files_to_delete)
+                if deleted_count:
+                    logger.info("Successfully deleted %s files for session %s", deleted_count, session_key)
             
             return {
                 'success': len(errors) == 0,
@@ -595,7 +804,7 @@ class SupabaseStorageService:
             }
             
         except Exception as e:
-            logger.error(f"Error cleaning up session {session_key}: {str(e)}")
+            logger.error("Error cleaning up session %s: %s", session_key, e)
             return {
                 'success': False,
                 'error': str(e),
@@ -618,38 +827,12 @@ class SupabaseStorageService:
             
             all_files = self.list_all_files()
             total_files = len(all_files)
-            total_size = 0
-            file_types = {}
-            old_files_count = 0
+            cutoff_key = (datetime.now() - timedelta(hours=1)).isoformat(timespec='seconds')
             
-            cutoff_time = datetime.now() - timedelta(hours=1)
-            
-            for file_info in all_files:
-                # Count file size
-                file_size = file_info.get('metadata', {}).get('size', 0)
-                total_size += file_size
-                
-                # Count file types
-                file_name = file_info.get('name', '')
-                file_ext = os.path.splitext(file_name)[1].lower()
-                file_types[file_ext] = file_types.get(file_ext, 0) + 1
-                
-                # Count old files
-                try:
-                    file_created = file_info.get('created_at')
-                    if file_created:
-                        if isinstance(file_created, str):
-                            file_date = datetime.fromisoformat(file_created.replace('Z', '+00:00'))
-                        else:
-                            file_date = file_created
-                        
-                        if file_date.tzinfo:
-                            file_date = file_date.replace(tzinfo=None)
-                        
-                        if file_date < cutoff_time:
-                            old_files_count += 1
-                except:
-                    pass
+            # Folder placeholders come back with metadata=None
+            total_size = sum((f.get('metadata') or {}).get('size', 0) or 0 for f in all_files)
+            file_types = dict(Counter(_file_ext(f.get('name', '')) for f in all_files))
+            old_files_count = sum(1 for f in all_files if _created_before(f.get('created_at'), cutoff_key))
             
             return {
                 'success': True,
@@ -662,12 +845,44 @@ class SupabaseStorageService:
             }
             
         except Exception as e:
-            logger.error(f"Error getting storage stats: {str(e)}")
+            logger.error("Error getting storage stats: %s", e)
             return {
                 'success': False,
                 'error': str(e)
             }
     
+    def _parallel_remove(self, paths, chunk_size=100, workers=16):
+        """
+        Remove storage objects in chunks, issuing the chunk requests concurrently
+        
+        Args:
+            paths: Object paths to remove
+            chunk_size: Maximum number of paths per remove request
+            workers: Maximum number of requests in flight
+            
+        Returns:
+            tuple: (number of paths deleted, list of error messages)
+        """
+        chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+        if not chunks:
+            return 0, []
+        
+        bucket = self.supabase.storage.from_(self.bucket_name)
+        deleted_count = 0
+        errors = []
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            futures = {executor.submit(bucket.remove, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    response = future.result()
+                    if response is not None and not hasattr(response, 'error'):
+                        deleted_count += len(futures[future])
+                    else:
+                        errors.append(f"Failed to delete files: {response}")
+                except Exception as e:
+                    errors.append(f"Error deleting files: {str(e)}")
+        return deleted_count, errors
+    
     def _is_output_file(self, filename):
         """
         Check if a file is a generated output file
@@ -678,11 +893,12 @@ class SupabaseStorageService:
         Returns:
             bool: True if it's an output file
         """
-        output_extensions = ['.xlsx', '.pdf', '.docx']
-        file_ext = os.path.splitext(filename)[1].lower()
-        return file_ext in output_extensions
+        return _file_ext(filename) in self._OUTPUT_EXTS
 
 
+# Raw deletes: nothing has a foreign key into ProcessedDocument and no delete signals are
+# registered, so QuerySet._raw_delete() removes the same rows as delete() without loading
+# them into the collector. Revisit the cleanup paths below if either of those changes.
 class FileCleanupService:
     """Service for managing file cleanup and storage maintenance"""
     
@@ -714,20 +930,22 @@ class FileCleanupService:
                 last_activity__lt=cutoff_time
             )
             
-            # Clean up associated documents
+            # Remove each expired session's folder concurrently, outside any DB transaction
+            session_keys = list(old_sessions.values_list('session_key', flat=True))
+            prefix_cleanup = self._cleanup_prefixes(session_keys)
+            
+            # Clean up associated documents (joined filter rather than an IN subquery)
             old_documents = ProcessedDocument.objects.filter(
-                session__in=old_sessions
+                session__last_activity__lt=cutoff_time
             )
             
-            # Count before deletion
-            sessions_count = old_sessions.count()
-            documents_count = old_documents.count()
+            # One DELETE per table in a single transaction; each returns its row count,
+            # so no separate COUNT queries and no collector walk (no signals or further cascades)
+            with transaction.atomic():
+                documents_count = old_documents._raw_delete(old_documents.db)
+                sessions_count = old_sessions._raw_delete(old_sessions.db)
             
-            # Delete old documents and sessions
-            old_documents.delete()
-            old_sessions.delete()
-            
-            logger.info(f"Cleaned up {sessions_count} old sessions and {documents_count} documents")
+            logger.info("Cleaned up %s old sessions and %s documents", sessions_count, documents_count)
             
             # Consider cleanup successful if database cleanup worked, even if storage failed
             overall_success = True
@@ -742,12 +960,13 @@ class FileCleanupService:
                     'sessions_deleted': sessions_count,
                     'documents_deleted': documents_count
                 },
-                'total_files_deleted': storage_cleanup.get('files_deleted', 0),
+                'session_storage_cleanup': prefix_cleanup,
+                'total_files_deleted': storage_cleanup.get('files_deleted', 0) + prefix_cleanup['files_deleted'],
                 'cutoff_time': cutoff_time.isoformat()
             }
             
         except Exception as e:
-            logger.error(f"Error during expired files cleanup: {str(e)}")
+            logger.error("Error during expired files cleanup: %s", e)
             return {
                 'success': False,
                 'error': str(e),
@@ -758,13 +977,35 @@ class FileCleanupService:
                 }
             }
     
-    def cleanup_session_manually(self, session_key, cleanup_outputs=True):
+    def _cleanup_prefixes(self, session_keys, workers=8):
+        """
+        Clean up several session folders in parallel and merge their reports
+        
+        Args:
+            session_keys: Session keys whose storage folders should be emptied
+            workers: Maximum number of folders cleaned concurrently
+            
+        Returns:
+            dict: Combined counts and errors across all folders
+        """
+        summary = {'sessions': len(session_keys), 'files_deleted': 0, 'errors': []}
+        if not session_keys or not self.storage_service.supabase:
+            return summary
+        
+        with ThreadPoolExecutor(max_workers=min(workers, len(session_keys))) as executor:
+            for result in executor.map(self.storage_service.cleanup_session_files_advanced, session_keys):
+                summary['files_deleted'] += result.get('files_deleted', 0)
+                summary['errors'].extend(result.get('errors') or ([result['error']] if result.get('error') else []))
+        return summary
+    
+    def cleanup_session_manually(self, session_key, cleanup_outputs=True, fast=True):
         """
         Manually clean up a specific session and its files
         
         Args:
             session_key: Session key to clean up
             cleanup_outputs: Whether to clean up generated output files
+            fast: Delete rows with raw DELETEs; False runs the collector and delete signals
             
         Returns:
             dict: Cleanup results
@@ -781,12 +1022,19 @@ class FileCleanupService:
             
             # Always try to clean up database records
             try:
-                session = UserSession.objects.get(session_key=session_key)
-                documents_count = session.documents.count()
-                
-                # Delete documents and session
-                session.documents.all().delete()
-                session.delete()
+                if fast:
+                    documents = ProcessedDocument.objects.filter(session__session_key=session_key)
+                    sessions = UserSession.objects.filter(session_key=session_key)
+                    with transaction.atomic():
+                        documents_count = documents._raw_delete(documents.db)
+                        if not sessions._raw_delete(sessions.db):
+                            raise UserSession.DoesNotExist
+                else:
+                    session = UserSession.objects.get(session_key=session_key)
+                    
+                    # Delete documents and session; delete() reports the rows it removed
+                    documents_count, _ = session.documents.all().delete()
+                    session.delete()
                 
                 database_success = True
                 database_error = None
@@ -816,13 +1064,63 @@ class FileCleanupService:
             }
             
         except Exception as e:
-            logger.error(f"Error during manual session cleanup: {str(e)}")
+            logger.error("Error during manual session cleanup: %s", e)
             return {
                 'success': False,
                 'error': str(e),
                 'session_key': session_key
             }
     
+    def cleanup_sessions_bulk(self, session_keys):
+        """
+        Clean up several sessions at once: their storage folders, then one DELETE per table
+        
+        Args:
+            session_keys: Session keys to clean up
+            
+        Returns:
+            dict: Cleanup results
+        """
+        from .models import ProcessedDocument, UserSession
+        
+        if not session_keys:
+            return {
+                'success': True,
+                'storage_cleanup': {'sessions': 0, 'files_deleted': 0, 'errors': []},
+                'database_cleanup': {'success': True, 'sessions_deleted': 0, 'documents_deleted': 0}
+            }
+        
+        try:
+            # Storage work is per folder and unavoidable; it runs concurrently outside the transaction
+            storage_cleanup = self._cleanup_prefixes(session_keys)
+            
+            documents = ProcessedDocument.objects.filter(session__session_key__in=session_keys)
+            sessions = UserSession.objects.filter(session_key__in=session_keys)
+            with transaction.atomic():
+                documents_count = documents._raw_delete(documents.db)
+                sessions_count = sessions._raw_delete(sessions.db)
+            
+            return {
+                'success': not storage_cleanup['errors'],
+                'storage_cleanup': storage_cleanup,
+                'database_cleanup': {
+                    'success': True,
+                    'sessions_deleted': sessions_count,
+                    'documents_deleted': documents_count
+                }
+            }
+            
+        except Exception as e:
+            logger.error("Error during bulk session cleanup: %s", e)
+            return {
+                'success': False,
+                'error': str(e),
+                'database_cleanup': {
+                    'sessions_deleted': 0,
+                    'documents_deleted': 0
+                }
+            }
+    
     def get_cleanup_candidates(self, hours_old=1):
         """
         Get list of sessions and files that are candidates for cleanup
@@ -833,28 +1131,28 @@ class FileCleanupService:
         Returns:
             dict: Information about cleanup candidates
         """
-        from .models import ProcessedDocument, UserSession
+        from .models import UserSession
         
         try:
             cutoff_time = datetime.now() - timedelta(hours=hours_old)
             
-            # Find old sessions
-            old_sessions = UserSession.objects.filter(
+            # Find old sessions with their document counts in one aggregate query
+            old_sessions = list(UserSession.objects.filter(
                 last_activity__lt=cutoff_time
-            ).values('session_key', 'last_activity', 'is_active')
+            ).annotate(
+                doc_count=Count('documents')
+            ).values('session_key', 'last_activity', 'is_active', 'doc_count'))
             
             # Get storage statistics
             storage_stats = self.storage_service.get_storage_stats()
             
             # Count documents for old sessions
-            old_documents_count = ProcessedDocument.objects.filter(
-                session__last_activity__lt=cutoff_time
-            ).count()
+            old_documents_count = sum(session['doc_count'] for session in old_sessions)
             
             return {
                 'success': True,
                 'cutoff_time': cutoff_time.isoformat(),
-                'old_sessions': list(old_sessions),
+                'old_sessions': old_sessions,
                 'old_sessions_count': len(old_sessions),
                 'old_documents_count': old_documents_count,
                 'storage_stats': storage_stats,
@@ -862,7 +1160,7 @@ class FileCleanupService:
             }
             
         except Exception as e:
-            logger.error(f"Error getting cleanup candidates: {str(e)}")
+            logger.error("Error getting cleanup candidates: %s", e)
             return {
                 'success': False,
                 'error': str(e)
@@ -885,13 +1183,16 @@ class FileCleanupService:
         if cleanup_result.get('success'):
             files_deleted = cleanup_result.get('total_files_deleted', 0)
             sessions_deleted = cleanup_result.get('database_cleanup', {}).get('sessions_deleted', 0)
-            logger.info(f"Automatic cleanup completed: {files_deleted} files, {sessions_deleted} sessions deleted")
+            logger.info("Automatic cleanup completed: %s files, %s sessions deleted", files_deleted, sessions_deleted)
         else:
-            logger.error(f"Automatic cleanup failed: {cleanup_result.get('error', 'Unknown error')}")
+            logger.error("Automatic cleanup failed: %s", cleanup_result.get('error', 'Unknown error'))
         
         return cleanup_result
 
 
+ACTIVE_SESSION_COUNT_CACHE_KEY = 'parser:active_session_count'
+
+
 class SessionService:
     """Service for managing user sessions and concurrent limits"""
     
@@ -922,8 +1223,12 @@ class SessionService:
             return user_session, False, None
             
         except UserSession.DoesNotExist:
-            # Check concurrent user limit
-            active_count = UserSession.get_active_session_count()
+            # Check concurrent user limit (count cached briefly; this runs on every new visitor)
+            active_count = cache.get_or_set(
+                ACTIVE_SESSION_COUNT_CACHE_KEY,
+                UserSession.get_active_session_count,
+                timeout=2
+            )
             if active_count >= 4:
                 return None, False, "System is at capacity (4 users). Please try again later."
             
@@ -932,6 +1237,7 @@ class SessionService:
                 session_key=session_key,
                 is_active=True
             )
+            cache.delete(ACTIVE_SESSION_COUNT_CACHE_KEY)
             return user_session, True, None
     
     @staticmethod
@@ -940,36 +1246,90 @@ class SessionService:
         from .models import UserSession
         
         cutoff_time = datetime.now() - timedelta(hours=1)
-        inactive_sessions = UserSession.objects.filter(
+        session_keys = list(UserSession.objects.filter(
             last_activity__lt=cutoff_time,
             is_active=True
-        )
+        ).values_list('session_key', flat=True))
         
-        # Clean up storage for inactive sessions using enhanced cleanup
-        cleanup_service = FileCleanupService()
-        for session in inactive_sessions:
-            cleanup_service.cleanup_session_manually(session.session_key, cleanup_outputs=True)
-        
-        # Deactivate sessions (this will be handled by cleanup_session_manually, but kept for safety)
-        inactive_sessions.update(is_active=False)
+        # One storage fan-out and one DELETE per table instead of a cleanup per session
+        return FileCleanupService().cleanup_sessions_bulk(session_keys)
+
+
+# Whitespace around a line break (\n, \r\n or a lone \r), including any blank lines after it
+_LINE_BREAK_WS_RE = re.compile(r'[^\S\n]*[\r\n]\s*')
+_MULTI_SPACE_RE = re.compile(r'[ \t]+')
+
+
+@functools.lru_cache(maxsize=1)
+def _ocr_executor() -> ThreadPoolExecutor:
+    """
+    Create the OCR thread pool once per process, on the first scanned PDF
+    
+    Shared by every PDF request; tesseract runs as a child process per page, so
+    threads are enough to keep all cores busy and the pool is not rebuilt for
+    each document.
+    """
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='ocr')
+
+
+def _find_tesseract_cmd():
+    """Locate tesseract.exe in the common Windows install folders; None elsewhere or if absent"""
+    if os.name != 'nt':
+        return None
+    possible_paths = [
+        r'C:\Program Files\Tesseract-OCR\tesseract.exe',
+        r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
+        r'C:\Users\{}\AppData\Local\Tesseract-OCR\tesseract.exe'.format(os.getenv('USERNAME', ''))
+    ]
+    return next((path for path in possible_paths if os.path.exists(path)), None)
+
+
+# Resolved once per process instead of probing the filesystem for every OCRService
+_TESSERACT_CMD = _find_tesseract_cmd()
+
+
+@functools.lru_cache(maxsize=1)
+def _configure_pillow_arena():
+    """
+    Let Pillow's image arena keep up to four freed 16 MB blocks for the next
+    preprocessing pass instead of handing them back to the OS (its default keeps none)
+    
+    Runs once, from the first OCRService, so importing this module does not change
+    Pillow's allocator for the rest of the process; PILLOW_BLOCKS_MAX in the
+    environment still takes precedence.
+    """
+    if 'PILLOW_BLOCKS_MAX' not in os.environ:
+        Image.core.set_blocks_max(4)
+
+
+# ImageEnhance.Sharpness(2.0) is 2*image - SMOOTH(image); folding that into one kernel
+# sharpens in a single filter pass instead of a filter plus a blend
+_OCR_SHARPEN = ImageFilter.Kernel((3, 3), (-1, -1, -1, -1, 21, -1, -1, -1, -1), scale=13)
+
+
+def _contrast_lut(image, factor):
+    """Lookup table equivalent to ImageEnhance.Contrast(image).enhance(factor) for an 'L' image"""
+    histogram = image.histogram()
+    mean = int(sum(i * count for i, count in enumerate(histogram)) / (sum(histogram) or 1) + 0.5)
+    return [min(255, max(0, int(mean + factor * (i - mean)))) for i in range(256)]
 
 
 class OCRService:
     """Service for extracting text from images using Tesseract OCR"""
     
+    # Result of the `tesseract --version` probe; None until the first check
+    _tesseract_available: Optional[bool] = None
+    
     def __init__(self):
         # Configure Tesseract path if needed (Windows)
-        if os.name == 'nt':  # Windows
-            # Try common Tesseract installation paths
-            possible_paths = [
-                r'C:\Program Files\Tesseract-OCR\tesseract.exe',
-                r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
-                r'C:\Users\{}\AppData\Local\Tesseract-OCR\tesseract.exe'.format(os.getenv('USERNAME', ''))
-            ]
-            for path in possible_paths:
-                if os.path.exists(path):
-                    pytesseract.pytesseract.tesseract_cmd = path
-                    break
+        if _TESSERACT_CMD:
+            pytesseract.pytesseract.tesseract_cmd = _TESSERACT_CMD
+        _configure_pillow_arena()
+    
+    @classmethod
+    def reset_cache(cls):
+        """Forget the Tesseract probe result so the next check runs it again"""
+        cls._tesseract_available = None
     
     def extract_text_from_image(self, image_file):
         """
@@ -1001,35 +1361,51 @@ class OCRService:
                 }
             
             # Load image
-            if hasattr(image_file, 'read'):
-                # File object
+            if isinstance(image_file, Image.Image):
+                # Already decoded (e.g. a rendered PDF page)
+                image = image_file
+            elif hasattr(image_file, 'read'):
+                # File object: Pillow reads it directly; load() decodes while the handle is open
                 image_file.seek(0)
-                image_data = image_file.read()
-                image = Image.open(io.BytesIO(image_data))
+                image = Image.open(image_file)
+                image.load()
             else:
                 # File path
                 image = Image.open(image_file)
             
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
+            # Convert to RGB if necessary (grayscale is kept; preprocessing ends in 'L' anyway)
+            if image.mode not in ('RGB', 'L'):
                 image = image.convert('RGB')
             
+            return self._ocr_pil_image(image)
+            
+        except Exception as e:
+            return self._ocr_error_response(e)
+    
+    def _ocr_pil_image(self, image):
+        """
+        OCR an already-decoded image; the caller has checked that Tesseract is available
+        
+        Args:
+            image: PIL Image in 'RGB' or 'L' mode
+            
+        Returns:
+            dict: Same shape as extract_text_from_image
+        """
+        try:
             # Preprocess image for better OCR accuracy
             processed_image = self._preprocess_image(image)
             
             # Extract text with confidence data
+            # Raw TSV; walked once below instead of being expanded into per-column lists
             ocr_data = pytesseract.image_to_data(
                 processed_image, 
-                output_type=pytesseract.Output.DICT,
                 config='--psm 6'  # Assume uniform block of text
             )
             
-            # Extract text and calculate confidence
-            extracted_text = pytesseract.image_to_string(processed_image, config='--psm 6')
-            
-            # Calculate average confidence
-            confidences = [int(conf) for conf in ocr_data['conf'] if int(conf) > 0]
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+            # Rebuild the text and average confidence from the same pass instead of
+            # running tesseract a second time
+            extracted_text, avg_confidence = self._text_from_ocr_data(ocr_data)
             
             # Clean up extracted text
             cleaned_text = self._clean_extracted_text(extracted_text)
@@ -1062,68 +1438,80 @@ class OCRService:
             }
             
         except Exception as e:
-            logger.error(f"OCR extraction failed: {str(e)}")
-            
-            # Provide specific error messages for common issues
-            error_msg = str(e).lower()
-            if 'tesseract' in error_msg:
-                return {
-                    'success': False,
-                    'text': '',
-                    'confidence': 0,
-                    'error': 'OCR service error',
-                    'details': 'Tesseract OCR encountered an error during processing',
-                    'suggestions': [
-                        'Try uploading a different image format (JPG, PNG)',
-                        'Ensure the image is not corrupted',
-                        'Check that the image contains readable text'
-                    ],
-                    'retry_allowed': True,
-                    'installation_help': 'If Tesseract is not installed: https://github.com/tesseract-ocr/tesseract'
-                }
-            elif 'image' in error_msg or 'pil' in error_msg or 'cannot identify image file' in error_msg:
-                return {
-                    'success': False,
-                    'text': '',
-                    'confidence': 0,
-                    'error': 'Invalid image file',
-                    'details': 'The uploaded file is not a valid image or is corrupted',
-                    'suggestions': [
-                        'Check that the file is a valid JPG, PNG, or PDF',
-                        'Try opening the file on your computer to verify it works',
-                        'Re-save or re-export the image from your source application',
-                        'Try uploading a different file'
-                    ],
-                    'retry_allowed': True
-                }
-            elif 'memory' in error_msg or 'size' in error_msg:
-                return {
-                    'success': False,
-                    'text': '',
-                    'confidence': 0,
-                    'error': 'Image too large to process',
-                    'details': 'The image is too large for OCR processing',
-                    'suggestions': [
-                        'Resize the image to a smaller resolution',
-                        'Compress the image file',
-                        'Split large documents into smaller sections'
-                    ],
-                    'retry_allowed': True
-                }
-            else:
-                return {
-                    'success': False,
-                    'text': '',
-                    'confidence': 0,
-                    'error': 'OCR processing failed',
-                    'details': f'Unexpected error during text extraction: {str(e)}',
-                    'suggestions': [
-                        'Try uploading a different image',
-                        'Check that the image is clear and readable',
-                        'Try again in a few moments'
-                    ],
-                    'retry_allowed': True
-                }
+            return self._ocr_error_response(e)
+    
+    def _ocr_error_response(self, e):
+        """
+        Map an OCR exception to a user-facing error response
+        
+        Args:
+            e: Exception raised while loading or recognising the image
+            
+        Returns:
+            dict: Error response with suggestions
+        """
+        logger.error("OCR extraction failed: %s", e)
+        
+        # Provide specific error messages for common issues
+        error_msg = str(e).lower()
+        if 'tesseract' in error_msg:
+            return {
+                'success': False,
+                'text': '',
+                'confidence': 0,
+                'error': 'OCR service error',
+                'details': 'Tesseract OCR encountered an error during processing',
+                'suggestions': [
+                    'Try uploading a different image format (JPG, PNG)',
+                    'Ensure the image is not corrupted',
+                    'Check that the image contains readable text'
+                ],
+                'retry_allowed': True,
+                'installation_help': 'If Tesseract is not installed: https://github.com/tesseract-ocr/tesseract'
+            }
+        elif 'image' in error_msg or 'pil' in error_msg or 'cannot identify image file' in error_msg:
+            return {
+                'success': False,
+                'text': '',
+                'confidence': 0,
+                'error': 'Invalid image file',
+                'details': 'The uploaded file is not a valid image or is corrupted',
+                'suggestions': [
+                    'Check that the file is a valid JPG, PNG, or PDF',
+                    'Try opening the file on your computer to verify it works',
+                    'Re-save or re-export the image from your source application',
+                    'Try uploading a different file'
+                ],
+                'retry_allowed': True
+            }
+        elif 'memory' in error_msg or 'size' in error_msg:
+            return {
+                'success': False,
+                'text': '',
+                'confidence': 0,
+                'error': 'Image too large to process',
+                'details': 'The image is too large for OCR processing',
+                'suggestions': [
+                    'Resize the image to a smaller resolution',
+                    'Compress the image file',
+                    'Split large documents into smaller sections'
+                ],
+                'retry_allowed': True
+            }
+        else:
+            return {
+                'success': False,
+                'text': '',
+                'confidence': 0,
+                'error': 'OCR processing failed',
+                'details': f'Unexpected error during text extraction: {str(e)}',
+                'suggestions': [
+                    'Try uploading a different image',
+                    'Check that the image is clear and readable',
+                    'Try again in a few moments'
+                ],
+                'retry_allowed': True
+            }
     
     def extract_text_from_pdf(self, pdf_file):
         """
@@ -1136,47 +1524,71 @@ class OCRService:
             dict: Contains extracted text and processing info
         """
         try:
-            # Load PDF
-            if hasattr(pdf_file, 'read'):
+            # Load PDF; disk-backed uploads are opened by path so the bytes never enter the heap
+            if hasattr(pdf_file, 'temporary_file_path'):
+                pdf_document = fitz.open(pdf_file.temporary_file_path())
+            elif hasattr(pdf_file, 'read'):
                 pdf_file.seek(0)
                 pdf_data = pdf_file.read()
                 pdf_document = fitz.open(stream=pdf_data, filetype="pdf")
             else:
                 pdf_document = fitz.open(pdf_file)
             
-            all_text = []
-            total_confidence = 0
+            page_texts = {}
+            page_images = {}
+            # Confidence is averaged per character, so a short caption page can't outweigh
+            # a dense page and blank pages don't count at all
+            weighted_confidence = 0
+            text_length = 0
             page_count = 0
             
             for page_num in range(len(pdf_document)):
                 page = pdf_document.load_page(page_num)
                 
-                # Try to extract text directly first
-                page_text = page.get_text()
+                # Try to extract text directly first; only text blocks (type 0), not image blocks
+                page_text = '\n'.join(block[4] for block in page.get_text('blocks') if block[6] == 0)
+                stripped = page_text.strip()
+                # Only pages with little text and an embedded image need OCR
+                needs_ocr = len(stripped) < 20 and bool(page.get_images(full=False))
                 
-                if page_text.strip():
+                if stripped and not needs_ocr:
                     # Text-based PDF
-                    all_text.append(page_text)
-                    total_confidence += 95  # High confidence for text-based PDFs
-                else:
-                    # Image-based PDF - use OCR
-                    pix = page.get_pixmap()
-                    img_data = pix.tobytes("png")
-                    image = Image.open(io.BytesIO(img_data))
-                    
-                    ocr_result = self.extract_text_from_image(image)
-                    if ocr_result['success']:
-                        all_text.append(ocr_result['text'])
-                        total_confidence += ocr_result['confidence']
-                    else:
-                        logger.warning(f"OCR failed for PDF page {page_num + 1}")
+                    page_texts[page_num] = page_text
+                    weighted_confidence += 95 * len(stripped)  # High confidence for text-based PDFs
+                    text_length += len(stripped)
+                elif needs_ocr:
+                    # Image-based PDF - render at 2x (144 DPI) as 1-byte grayscale and
+                    # wrap the raw pixmap samples, no PNG round trip
+                    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2), colorspace=fitz.csGRAY, alpha=False)
+                    page_images[page_num] = Image.frombuffer(
+                        'L', (pix.width, pix.height), pix.samples, 'raw', 'L', pix.stride, 1
+                    )
                 
                 page_count += 1
             
             pdf_document.close()
             
+            # OCR scanned pages concurrently; each tesseract call is its own process. The
+            # rendered pages are already grayscale images, so they skip the loader entirely
+            if page_images and not self._is_tesseract_available():
+                logger.warning("Tesseract unavailable, skipping OCR for %s scanned PDF pages", len(page_images))
+                page_images = {}
+            if len(page_images) == 1:
+                ocr_results = [self._ocr_pil_image(next(iter(page_images.values())))]
+            else:
+                ocr_results = _ocr_executor().map(self._ocr_pil_image, page_images.values())
+            for page_num, ocr_result in zip(page_images, ocr_results):
+                if ocr_result['success']:
+                    page_texts[page_num] = ocr_result['text']
+                    weighted_confidence += ocr_result['confidence'] * len(ocr_result['text'])
+                    text_length += len(ocr_result['text'])
+                else:
+                    logger.warning("OCR failed for PDF page %s", page_num + 1)
+            
+            all_text = [page_texts[page_num] for page_num in sorted(page_texts)]
+            
             combined_text = '\n\n'.join(all_text)
-            avg_confidence = total_confidence / page_count if page_count > 0 else 0
+            avg_confidence = weighted_confidence / text_length if text_length else 0
             
             return {
                 'success': True,
@@ -1188,7 +1600,7 @@ class OCRService:
             }
             
         except Exception as e:
-            logger.error(f"PDF text extraction failed: {str(e)}")
+            logger.error("PDF text extraction failed: %s", e)
             return {
                 'success': False,
                 'text': '',
@@ -1208,6 +1620,10 @@ class OCRService:
             PIL Image: Preprocessed image
         """
         try:
+            # Convert to grayscale first so the resize works on one channel instead of three
+            if image.mode != 'L':
+                image = image.convert('L')
+            
             # Resize image if too small (OCR works better on larger images)
             width, height = image.size
             if width < 1000 or height < 1000:
@@ -1216,16 +1632,11 @@ class OCRService:
                 new_height = int(height * scale_factor)
                 image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
             
-            # Convert to grayscale
-            image = image.convert('L')
-            
-            # Enhance contrast
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(1.5)
+            # Enhance contrast: one table lookup per pixel, no intermediate gray image to blend with
+            image = image.point(_contrast_lut(image, 1.5))
             
             # Enhance sharpness
-            enhancer = ImageEnhance.Sharpness(image)
-            image = enhancer.enhance(2.0)
+            image = image.filter(_OCR_SHARPEN)
             
             # Apply slight blur to reduce noise
             image = image.filter(ImageFilter.MedianFilter(size=3))
@@ -1233,9 +1644,39 @@ class OCRService:
             return image
             
         except Exception as e:
-            logger.warning(f"Image preprocessing failed, using original: {str(e)}")
+            logger.warning("Image preprocessing failed, using original: %s", e)
             return image
     
+    def _text_from_ocr_data(self, ocr_data):
+        """
+        Rebuild plain text and average confidence from pytesseract image_to_data output
+        
+        Args:
+            ocr_data: TSV string returned by image_to_data (the default Output.STRING);
+                columns are level, page_num, block_num, par_num, line_num, word_num,
+                left, top, width, height, conf, text
+            
+        Returns:
+            tuple: (words joined by spaces with one line per Tesseract text line,
+                    average confidence of the recognised words)
+        """
+        lines = {}
+        confidence_total = 0
+        confidence_count = 0
+        for row in ocr_data.splitlines()[1:]:
+            fields = row.split('\t', 11)
+            if len(fields) < 12:
+                continue
+            conf = float(fields[10])
+            if conf > 0:
+                confidence_total += int(conf)
+                confidence_count += 1
+            word = fields[11]
+            if word.strip():
+                lines.setdefault((fields[2], fields[3], fields[4]), []).append(word)
+        text = '\n'.join(' '.join(words) for words in lines.values())
+        return text, (confidence_total / confidence_count if confidence_count else 0)
+    
     def _clean_extracted_text(self, text):
         """
         Clean and normalize extracted text
@@ -1249,32 +1690,27 @@ class OCRService:
         if not text:
             return ""
         
-        # Remove excessive whitespace
-        lines = [line.strip() for line in text.split('\n')]
-        lines = [line for line in lines if line]  # Remove empty lines
-        
-        # Join lines with single newlines
-        cleaned_text = '\n'.join(lines)
-        
-        # Remove multiple spaces
-        import re
-        cleaned_text = re.sub(r' +', ' ', cleaned_text)
-        
-        return cleaned_text.strip()
+        # Strip every line, drop empty lines, then collapse runs of spaces
+        return _MULTI_SPACE_RE.sub(' ', _LINE_BREAK_WS_RE.sub('\n', text).strip())
     
     def _is_tesseract_available(self):
         """
         Check if Tesseract OCR is available on the system
         
+        The probe spawns a subprocess, so its result is kept for the life of the process.
+        
         Returns:
             bool: True if Tesseract is available
         """
-        try:
-            # Try to get Tesseract version
-            pytesseract.get_tesseract_version()
-            return True
-        except Exception:
-            return False
+        cls = type(self)
+        if cls._tesseract_available is None:
+            try:
+                # Try to get Tesseract version
+                pytesseract.get_tesseract_version()
+                cls._tesseract_available = True
+            except Exception:
+                cls._tesseract_available = False
+        return cls._tesseract_available
     
     def process_file(self, file_obj, file_type):
         """
@@ -1318,7 +1754,7 @@ class OCRService:
                 }
                 
         except Exception as e:
-            logger.error(f"File processing failed for {file_type}: {str(e)}")
+            logger.error("File processing failed for %s: %s", file_type, e)
             return {
                 'success': False,
                 'text': '',
@@ -1328,6 +1764,330 @@ class OCRService:
             }
 
 
+@functools.lru_cache(maxsize=1)
+def _get_openai():
+    """
+    Create the OpenAI client once per process over a bounded, keep-alive HTTP pool
+    
+    Concurrent parses (see LLMService.parse_many) share these connections instead of
+    each LLMService opening its own pool.
+    """
+    import httpx  # installed with openai
+    try:
+        import h2  # noqa: F401 - HTTP/2 multiplexes parses over fewer TLS sessions when available
+        http2 = True
+    except ImportError:
+        http2 = False
+    http_client = httpx.Client(
+        http2=http2,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30.0),
+        timeout=httpx.Timeout(60.0, connect=5.0),
+    )
+    # The SDK retries 429s and 5xx with exponential backoff, honouring Retry-After
+    return openai.OpenAI(api_key=settings.OPENAI_API_KEY, http_client=http_client, max_retries=5)
+
+
+class _TokenBucket:
+    """Thread-safe token bucket holding `capacity` tokens, refilled evenly over `period` seconds"""
+    
+    def __init__(self, capacity, period=60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self, amount=1):
+        """Block until `amount` tokens are available, then take them"""
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait_for = (amount - self.tokens) / self.rate
+            time.sleep(wait_for)
+
+
+@functools.lru_cache(maxsize=1)
+def _openai_limiters():
+    """Per-process request and token budgets; set OPENAI_RPM_LIMIT / OPENAI_TPM_LIMIT to the account's limits"""
+    return (
+        _TokenBucket(getattr(settings, 'OPENAI_RPM_LIMIT', 500)),
+        _TokenBucket(getattr(settings, 'OPENAI_TPM_LIMIT', 200000)),
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _token_encoder():
+    """tiktoken encoder for the parsing model, or None when tiktoken is not installed"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.encoding_for_model("gpt-3.5-turbo")
+
+
+def _count_tokens(text):
+    """Prompt size in tokens; ~4 characters per token when tiktoken is unavailable"""
+    encoder = _token_encoder()
+    if encoder is None:
+        return len(text) // 4
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+# gpt-3.5-turbo's context window, the completion budget reserved in it, and the size
+# of the pieces an oversized document is split into
+_OPENAI_CONTEXT_TOKENS = 16000
+_OPENAI_MAX_OUTPUT_TOKENS = 2000
+_OPENAI_CHUNK_TOKENS = 10000
+
+
+def _split_for_context(text, max_tokens=_OPENAI_CHUNK_TOKENS):
+    """
+    Greedily pack paragraphs into pieces of at most max_tokens
+    
+    A paragraph that is too large by itself is split on lines, and a single
+    oversized line is halved until each half fits, so every piece fits. Each
+    unit keeps the separator that preceded it, so every piece is an unaltered
+    slice of the input text.
+    """
+    def units(block, separator, split_lines):
+        """(text, separator before it) pairs covering block"""
+        if len(block) <= 1 or _count_tokens(block) <= max_tokens:
+            return [(block, separator)]
+        if split_lines:
+            return [
+                unit
+                for number, line in enumerate(block.split('\n'))
+                for unit in units(line, '\n' if number else separator, False)
+            ]
+        middle = len(block) // 2
+        return units(block[:middle], separator, False) + units(block[middle:], '', False)
+    
+    pieces, current, current_tokens = [], [], 0
+    for number, paragraph in enumerate(text.split('\n\n')):
+        for unit, separator in units(paragraph, '\n\n' if number else '', True):
+            unit_tokens = _count_tokens(unit)
+            if current and current_tokens + unit_tokens > max_tokens:
+                pieces.append(''.join(current))
+                current, current_tokens = [], 0
+            if current:
+                current.append(separator)
+            current.append(unit)
+            current_tokens += unit_tokens
+    if current:
+        pieces.append(''.join(current))
+    return [piece for piece in pieces if piece.strip()]
+
+
+def _throttle_openai(prompt, max_tokens):
+    """
+    Pace a chat completion before sending it instead of finding out from a 429
+    
+    prompt is the prompt text, or its size in tokens when the caller already counted it.
+    """
+    requests_bucket, tokens_bucket = _openai_limiters()
+    requests_bucket.acquire()
+    prompt_tokens = prompt if isinstance(prompt, int) else _count_tokens(prompt)
+    tokens_bucket.acquire(prompt_tokens + max_tokens)
+
+
+# Output schema and rules shared by the single- and multi-document parsing prompts
+_PARSING_SCHEMA = """{
+    "document_type": "detected document type",
+    "confidence_score": 0.0-1.0,
+    "personal_information": {
+        "full_name": "extracted name or null",
+        "account_number": "account number or null",
+        "customer_id": "customer ID or null",
+        "address": "full address or null",
+        "phone": "phone number or null",
+        "email": "email address or null"
+    },
+    "financial_data": {
+        "account_balance": "current balance or null",
+        "available_balance": "available balance or null",
+        "transactions": [
+            {
+                "date": "transaction date",
+                "description": "transaction description",
+                "amount": "amount with sign",
+                "type": "debit/credit/transfer"
+            }
+        ],
+        "monthly_summary": {
+            "total_deposits": "total deposits or null",
+            "total_withdrawals": "total withdrawals or null",
+            "fees_charged": "fees charged or null"
+        }
+    },
+    "loan_information": {
+        "loan_amount": "loan amount or null",
+        "interest_rate": "interest rate or null",
+        "loan_term": "loan term or null",
+        "monthly_payment": "monthly payment or null",
+        "remaining_balance": "remaining balance or null"
+    },
+    "dates": {
+        "statement_date": "statement date or null",
+        "statement_period": "statement period or null",
+        "due_date": "payment due date or null"
+    },
+    "bank_information": {
+        "bank_name": "bank name or null",
+        "branch": "branch information or null",
+        "routing_number": "routing number or null",
+        "swift_code": "SWIFT code or null"
+    },
+    "extracted_text_quality": {
+        "clarity": "high/medium/low",
+        "completeness": "complete/partial/incomplete",
+        "issues": ["list of any issues found"]
+    }
+}"""
+
+
+_PARSING_RULES = """Important instructions:
+1. Use null for missing information, don't make up data
+2. For amounts, include currency symbols if present
+3. For dates, use consistent format (YYYY-MM-DD if possible)
+4. Set confidence_score based on text clarity and completeness
+5. Extract ALL transactions found in the document
+6. Be precise with numbers and dates"""
+
+# Bump when the prompts change; it namespaces OpenAI's prompt cache
+_PROMPT_VERSION = 'v3'
+
+# Successful OpenAI parses are reused for a week; the key covers everything the prompt depends on
+_OPENAI_CACHE_TIMEOUT = 7 * 24 * 3600
+
+
+def _openai_cache_key(text: str, document_type: str) -> str:
+    digest = hashlib.blake2b(f"{_PROMPT_VERSION}|{document_type}|{text}".encode(), digest_size=16).hexdigest()
+    return f"parser:openai_parse:{digest}"
+
+
+# Both providers are asked for JSON-only output, so replies parse without any slicing
+_GEMINI_JSON_CONFIG = {'response_mime_type': 'application/json'}
+_OPENAI_JSON_FORMAT = {'type': 'json_object'}
+
+_TRANSACTIONS_ARRAY_RE = re.compile(r'"transactions"\s*:\s*\[')
+
+
+class _TransactionStreamScanner:
+    """
+    Pick complete transaction objects out of a JSON reply while it is still streaming
+    
+    Feed text deltas in order; each call returns the transactions whose closing brace
+    has arrived since the previous call. Only the first "transactions" array is read.
+    """
+    
+    def __init__(self):
+        self._buffer = ''
+        self._pos = None  # next unread offset inside the array, once it is found
+        self._done = False
+        self._decoder = json.JSONDecoder()
+    
+    def feed(self, delta: str) -> List[Dict[str, Any]]:
+        if self._done or not delta:
+            return []
+        search_from = max(0, len(self._buffer) - 32)
+        self._buffer += delta
+        if self._pos is None:
+            match = _TRANSACTIONS_ARRAY_RE.search(self._buffer, search_from)
+            if not match:
+                return []
+            self._pos = match.end()
+        elif '}' not in delta:
+            return []  # nothing can have closed since the last attempt
+        
+        items = []
+        buffer = self._buffer
+        while True:
+            pos = self._pos
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            self._pos = pos
+            if pos >= len(buffer):
+                break
+            if buffer[pos] != '{':
+                self._done = True  # closing bracket, or something unexpected
+                break
+            try:
+                item, self._pos = self._decoder.raw_decode(buffer, pos)
+            except ValueError:
+                break  # object still incomplete
+            items.append(item)
+        return items
+
+
+# Prompts open with these invariant blocks and end with the per-call document type and
+# text, so the provider can reuse its cached prefix across requests
+_PARSING_PROMPT_PREFIX = f"""Extract structured banking information from the document text below.
+Return ONLY valid JSON with the following structure:
+
+{_PARSING_SCHEMA}
+
+{_PARSING_RULES}
+"""
+
+_MULTI_PARSING_PROMPT_PREFIX = f"""Extract structured banking information from each of the documents below.
+Return ONLY valid JSON of the form {{"results": [...]}} where "results" holds exactly one object
+per document, in the order given, each with the following structure:
+
+{_PARSING_SCHEMA}
+
+{_PARSING_RULES}
+7. Never mix information between documents
+"""
+
+# OpenAI single-document parses send the schema as a fixed conversation opening, byte
+# for byte the same on every call, followed by one user message with the document
+_OPENAI_PARSING_PREAMBLE = (
+    {"role": "system", "content": "Return JSON matching the provided schema."},
+    {"role": "user", "content": _PARSING_PROMPT_PREFIX},
+    {"role": "assistant", "content": "Acknowledged."},
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _openai_preamble_tokens():
+    return sum(_count_tokens(message["content"]) for message in _OPENAI_PARSING_PREAMBLE)
+
+
+# Documents packed into one OpenAI request by LLMService.parse_batch_with_openai; the
+# character budget keeps a packed prompt near 6k input tokens (~4 characters per token).
+# Each packed document also reserves _OPENAI_MAX_OUTPUT_TOKENS of completion, and groups
+# shrink until prompt plus completion fit in _OPENAI_CONTEXT_TOKENS
+_BATCH_PARSE_SIZE = 5
+_BATCH_PARSE_MAX_CHARS = 24000
+_BATCH_SYSTEM_MESSAGE = "You are a banking document analysis expert. Extract structured data from documents and return valid JSON."
+
+# Structure every parsed reply must have; checked by LLMService._validate_parsed_data
+_NESTED_PARSE_KEYS = ('personal_information', 'financial_data', 'dates', 'bank_information')
+_REQUIRED_PARSE_KEYS = frozenset(('document_type', 'confidence_score') + _NESTED_PARSE_KEYS)
+
+
+# Documents LLMService.parse_many keeps in flight at once by default
+_PARSE_MANY_CONCURRENCY = 8
+
+
+@functools.lru_cache(maxsize=1)
+def _llm_executor() -> ThreadPoolExecutor:
+    """
+    Create the provider-call thread pool once per process, on the first parse
+    
+    Runs the Gemini and OpenAI requests side by side; shared so a request can return
+    on the first success without waiting for the slower provider to finish. Each
+    race occupies two workers, so a full parse_many batch races every document at
+    once instead of queueing half of its legs.
+    """
+    return ThreadPoolExecutor(max_workers=2 * _PARSE_MANY_CONCURRENCY, thread_name_prefix='llm')
+
 class LLMService:
     """Service for parsing extracted text using LLM APIs (OpenAI and Gemini)"""
     
@@ -1335,21 +2095,23 @@ class LLMService:
         # Initialize OpenAI client
         self.openai_client = None
         if hasattr(settings, 'OPENAI_API_KEY') and settings.OPENAI_API_KEY:
-            self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+            self.openai_client = _get_openai()
         
         # Initialize Gemini client
         self.gemini_client = None
         if hasattr(settings, 'GEMINI_API_KEY') and settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.gemini_client = genai.GenerativeModel('gemini-1.5-flash')
+            self.gemini_client = _get_gemini('gemini-1.5-flash')
     
-    def parse_banking_document(self, text: str, document_type: str = "banking_document") -> Dict[str, Any]:
+    def parse_banking_document(self, text: str, document_type: str = "banking_document",
+                               prefer: Optional[str] = None) -> Dict[str, Any]:
         """
         Parse banking document text using LLM to extract structured data
         
         Args:
             text: Extracted text from document
             document_type: Type of document (banking_document, loan_application, etc.)
+            prefer: 'gemini' or 'openai' to try that provider first and the other only on
+                failure; by default both run concurrently and the first success wins
             
         Returns:
             dict: Structured banking data with confidence scores
@@ -1361,6 +2123,16 @@ class LLMService:
                 'data': {}
             }
         
+        if prefer is None and self.gemini_client and self.openai_client:
+            return self._parse_with_race(text, document_type)
+        
+        if prefer == 'openai' and self.openai_client:
+            result = self._parse_with_openai(text, document_type)
+            if not result['success'] and self.gemini_client:
+                logger.info("OpenAI parsing failed, trying Gemini")
+                result = self._parse_with_gemini(text, document_type)
+            return result
+        
         # Try Gemini first, then OpenAI as fallback
         result = self._parse_with_gemini(text, document_type)
         if not result['success'] and self.openai_client:
@@ -1369,6 +2141,205 @@ class LLMService:
         
         return result
     
+    def parse_many(self, texts: List[str], document_type: str = "banking_document",
+                   max_concurrency: int = _PARSE_MANY_CONCURRENCY) -> List[Dict[str, Any]]:
+        """
+        Parse several documents concurrently
+        
+        Each parse is network-bound, so overlapping them on threads turns a batch of N
+        sequential round trips into roughly N / max_concurrency.
+        
+        Args:
+            texts: Extracted text of each document
+            document_type: Type shared by every document in the batch
+            max_concurrency: Maximum number of documents in flight at once; the provider
+                pool only races _PARSE_MANY_CONCURRENCY documents at a time
+            
+        Returns:
+            list: One parse_banking_document result per text, in input order
+        """
+        if not texts:
+            return []
+        # A pool of its own: the parses themselves submit provider calls to _llm_executor()
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(texts))) as executor:
+            return list(executor.map(lambda text: self.parse_banking_document(text, document_type), texts))
+    
+    def parse_batch_with_openai(self, texts: List[str], document_type: str = "banking_document",
+                                k: int = _BATCH_PARSE_SIZE) -> List[Dict[str, Any]]:
+        """
+        Parse several documents with as few OpenAI requests as possible
+        
+        Documents are packed up to k at a time (and within _BATCH_PARSE_MAX_CHARS) into one
+        prompt that states the schema once and asks for a "results" array. Every document
+        in a group gets the single-document completion budget, so a group only grows while
+        its prompt and completion fit the context window. A group whose response can't be
+        split back into one valid object per document is re-parsed document by document.
+        
+        Args:
+            texts: Extracted text of each document
+            document_type: Type shared by every document in the batch
+            k: Maximum documents per request
+            
+        Returns:
+            list: One _parse_with_openai-style result per text, in input order
+        """
+        token_budget = (_OPENAI_CONTEXT_TOKENS - _count_tokens(_BATCH_SYSTEM_MESSAGE)
+                        - _count_tokens(self._build_multi_parsing_prompt([], document_type)))
+        groups, group, group_chars, group_tokens = [], [], 0, 0
+        for text in texts:
+            text_tokens = _count_tokens(text) + _OPENAI_MAX_OUTPUT_TOKENS
+            if group and (len(group) >= k or group_chars + len(text) > _BATCH_PARSE_MAX_CHARS
+                          or group_tokens + text_tokens > token_budget):
+                groups.append(group)
+                group, group_chars, group_tokens = [], 0, 0
+            group.append(text)
+            group_chars += len(text)
+            group_tokens += text_tokens
+        if group:
+            groups.append(group)
+        
+        results = []
+        for group in groups:
+            packed = self._parse_group_with_openai(group, document_type) if len(group) > 1 else None
+            if packed is None:
+                packed = [self._parse_with_openai(text, document_type) for text in group]
+            results.extend(packed)
+        return results
+    
+    def _parse_group_with_openai(self, texts: List[str], document_type: str) -> Optional[List[Dict[str, Any]]]:
+        """Send one packed request; None when the response can't be mapped back per document"""
+        if not self.openai_client:
+            return None
+        
+        prompt = self._build_multi_parsing_prompt(texts, document_type)
+        prompt_tokens = _count_tokens(_BATCH_SYSTEM_MESSAGE) + _count_tokens(prompt)
+        max_tokens = _OPENAI_MAX_OUTPUT_TOKENS * len(texts)
+        if prompt_tokens + max_tokens > _OPENAI_CONTEXT_TOKENS:
+            return None
+        
+        try:
+            _throttle_openai(prompt_tokens, max_tokens)
+            response = self.openai_client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": _BATCH_SYSTEM_MESSAGE},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=0.1,  # Low temperature for consistent output
+                response_format=_OPENAI_JSON_FORMAT,
+                extra_body={"prompt_cache_key": f"bank_parse_batch_{_PROMPT_VERSION}_{document_type}"}
+            )
+            if response.choices[0].finish_reason == 'length':
+                logger.warning("Batched OpenAI parse hit its %s-token limit, parsing documents one by one", max_tokens)
+                return None
+            response_text = (response.choices[0].message.content or '').strip()
+            parsed = json_loads(response_text)
+            items = parsed.get('results') if isinstance(parsed, dict) else None
+        except Exception as e:
+            logger.warning("Batched OpenAI parse failed, parsing documents one by one: %s", e)
+            return None
+        
+        if not isinstance(items, list) or len(items) != len(texts):
+            logger.warning("Batched OpenAI parse returned %s results for %s documents",
+                           len(items) if isinstance(items, list) else 'no', len(texts))
+            return None
+        if not all(isinstance(item, dict) and self._validate_parsed_data(item) for item in items):
+            return None
+        
+        return [
+            {
+                'success': True,
+                'data': item,
+                'provider': 'openai',
+                'confidence': item.get('confidence_score', 0.8),
+                'message': 'Document parsed successfully with OpenAI'
+            }
+            for item in items
+        ]
+    
+    def _parse_oversized_with_openai(self, text: str, document_type: str) -> Dict[str, Any]:
+        """
+        Parse a document too large for one request by splitting it and merging the parts
+        
+        Pieces are parsed concurrently. The first piece supplies the document fields and
+        later pieces only fill in what it left null; transactions are concatenated in
+        order and the confidence is the lowest of the pieces.
+        """
+        pieces = _split_for_context(text)
+        logger.info("Document exceeds the OpenAI context window, parsing it in %d pieces", len(pieces))
+        # A pool of its own: this may itself be running on _llm_executor()
+        with ThreadPoolExecutor(max_workers=min(8, len(pieces))) as executor:
+            results = list(executor.map(lambda piece: self._parse_with_openai(piece, document_type), pieces))
+        
+        failed = next((result for result in results if not result['success']), None)
+        if failed is not None:
+            return failed
+        
+        merged = dict(results[0]['data'])
+        for section in _NESTED_PARSE_KEYS + ('loan_information',):
+            merged_section = dict(merged.get(section) or {})
+            for result in results[1:]:
+                for key, value in (result['data'].get(section) or {}).items():
+                    if key != 'transactions' and merged_section.get(key) in (None, '') and value not in (None, ''):
+                        merged_section[key] = value
+            merged[section] = merged_section
+        merged['financial_data']['transactions'] = [
+            transaction
+            for result in results
+            for transaction in (result['data'].get('financial_data') or {}).get('transactions') or []
+        ]
+        merged['confidence_score'] = min(result['data'].get('confidence_score', 0.8) for result in results)
+        
+        return {
+            'success': True,
+            'data': merged,
+            'provider': 'openai',
+            'confidence': merged['confidence_score'],
+            'message': f'Document parsed successfully with OpenAI in {len(pieces)} parts'
+        }
+    
+    def _stream_openai_reply(self, request: Dict[str, Any],
+                             on_transaction: Callable[[Dict[str, Any]], None]) -> str:
+        """Stream a chat completion, reporting transactions as they close; returns the full text"""
+        scanner = _TransactionStreamScanner()
+        pieces = []
+        for chunk in self.openai_client.chat.completions.create(stream=True, **request):
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                pieces.append(delta)
+                for transaction in scanner.feed(delta):
+                    on_transaction(transaction)
+        return ''.join(pieces)
+    
+    def _parse_with_race(self, text: str, document_type: str) -> Dict[str, Any]:
+        """
+        Query both providers at once and return the first successful result
+        
+        Hides the fallback round trip: when Gemini fails, OpenAI's answer is usually
+        already in flight. If both fail, OpenAI's error is returned, as in the serial path.
+        """
+        futures = {
+            _llm_executor().submit(self._parse_with_gemini, text, document_type): 'gemini',
+            _llm_executor().submit(self._parse_with_openai, text, document_type): 'openai',
+        }
+        results = {}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+            for provider in ('gemini', 'openai'):
+                if provider in results and results[provider]['success']:
+                    for future in pending:
+                        future.cancel()  # best effort; a request already sent runs to completion
+                    return results[provider]
+        
+        logger.info("Both Gemini and OpenAI parsing failed")
+        return results['openai']
+    
     def _parse_with_gemini(self, text: str, document_type: str) -> Dict[str, Any]:
         """Parse text using Gemini API with comprehensive error handling"""
         if not self.gemini_client:
@@ -1389,7 +2360,7 @@ class LLMService:
             prompt = self._build_parsing_prompt(text, document_type)
             
             # Generate response with Gemini
-            response = self.gemini_client.generate_content(prompt)
+            response = self.gemini_client.generate_content(prompt, generation_config=_GEMINI_JSON_CONFIG)
             
             if not response.text:
                 return {
@@ -1418,7 +2389,7 @@ class LLMService:
                 }
                 
         except Exception as e:
-            logger.error(f"Gemini API error: {str(e)}")
+            logger.error("Gemini API error: %s", e)
             error_msg = str(e).lower()
             
             # Provide specific error messages for common API issues
@@ -1452,11 +2423,7 @@ class LLMService:
                     'success': False,
                     'error': 'AI service connection failed',
                     'details': 'Could not connect to AI service',
-                    'suggestions': [
-                        'Check your internet connection',
-                        'Try again in a few minutes',
-                        'Contact support if problem persists'
-                    ],
+                    'suggestions': list(_SUGG_NETWORK_OR_SUPPORT),
                     'retry_allowed': True,
                     'data': {}
                 }
@@ -1465,17 +2432,55 @@ class LLMService:
                     'success': False,
                     'error': 'AI service error',
                     'details': f'Unexpected error from AI service: {str(e)}',
-                    'suggestions': [
-                        'Try again in a few minutes',
-                        'Try processing a different document',
-                        'Contact support if problem persists'
-                    ],
+                    'suggestions': list(_SUGG_AI_RETRY),
                     'retry_allowed': True,
                     'data': {}
                 }
     
-    def _parse_with_openai(self, text: str, document_type: str) -> Dict[str, Any]:
-        """Parse text using OpenAI API"""
+    def parse_streaming(self, text: str, on_transaction: Callable[[Dict[str, Any]], None],
+                        document_type: str = "banking_document") -> Dict[str, Any]:
+        """
+        Parse a document, handing each transaction to a callback as soon as it is known
+        
+        With OpenAI configured the reply is streamed, so callers can format transactions
+        while the rest is still being generated. Otherwise the buffered result is parsed
+        and its transactions are replayed through the callback.
+        
+        Args:
+            text: Extracted text from document
+            on_transaction: Called once per transaction dict, in document order
+            document_type: Type of document (banking_document, loan_application, etc.)
+            
+        Returns:
+            dict: The same result parse_banking_document would return
+        """
+        if not text or not text.strip():
+            return {
+                'success': False,
+                'error': 'No text provided for parsing',
+                'data': {}
+            }
+        
+        if self.openai_client:
+            result = self._parse_with_openai(text, document_type, on_transaction=on_transaction)
+            if result['success'] or not self.gemini_client:
+                return result
+            logger.info("OpenAI streaming parse failed, trying Gemini")
+        
+        result = self._parse_with_gemini(text, document_type)
+        if result['success']:
+            for transaction in result['data'].get('financial_data', {}).get('transactions', []):
+                on_transaction(transaction)
+        return result
+    
+    def _parse_with_openai(self, text: str, document_type: str,
+                           on_transaction: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Parse text using OpenAI API; identical text reuses the cached result
+        
+        When on_transaction is given the reply is streamed and each transaction is passed
+        to it as soon as its object is complete; a cached result is replayed the same way.
+        """
         if not self.openai_client:
             return {
                 'success': False,
@@ -1483,21 +2488,45 @@ class LLMService:
                 'data': {}
             }
         
+        cache_key = _openai_cache_key(text, document_type)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            cached['cached'] = True
+            if on_transaction is not None:
+                for transaction in cached['data'].get('financial_data', {}).get('transactions', []):
+                    on_transaction(transaction)
+            return cached
+        
         try:
-            prompt = self._build_parsing_prompt(text, document_type)
-            
-            # Generate response with OpenAI
-            response = self.openai_client.chat.completions.create(
+            document_message = f"Document type: {document_type}\nDocument text to analyze:\n{text}"
+            prompt_tokens = _openai_preamble_tokens() + _count_tokens(document_message)
+            if prompt_tokens + _OPENAI_MAX_OUTPUT_TOKENS > _OPENAI_CONTEXT_TOKENS:
+                # Would be rejected (or cut off) by the model; parse it in pieces instead
+                result = self._parse_oversized_with_openai(text, document_type)
+                if result['success']:
+                    cache.set(cache_key, result, timeout=_OPENAI_CACHE_TIMEOUT)
+                    if on_transaction is not None:
+                        for transaction in result['data']['financial_data'].get('transactions', []):
+                            on_transaction(transaction)
+                return result
+            
+            _throttle_openai(prompt_tokens, _OPENAI_MAX_OUTPUT_TOKENS)
+            
+            request = dict(
                 model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a banking document analysis expert. Extract structured data from documents and return valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.1  # Low temperature for consistent output
+                messages=[*_OPENAI_PARSING_PREAMBLE, {"role": "user", "content": document_message}],
+                max_tokens=_OPENAI_MAX_OUTPUT_TOKENS,
+                temperature=0.1,  # Low temperature for consistent output
+                response_format=_OPENAI_JSON_FORMAT,
+                extra_body={"prompt_cache_key": f"bank_parse_{_PROMPT_VERSION}_{document_type}"}
             )
             
-            response_text = response.choices[0].message.content
+            # Generate response with OpenAI
+            if on_transaction is None:
+                response = self.openai_client.chat.completions.create(**request)
+                response_text = response.choices[0].message.content
+            else:
+                response_text = self._stream_openai_reply(request, on_transaction)
             
             if not response_text:
                 return {
@@ -1510,13 +2539,15 @@ class LLMService:
             parsed_data = self._parse_llm_response(response_text)
             
             if parsed_data:
-                return {
+                result = {
                     'success': True,
                     'data': parsed_data,
                     'provider': 'openai',
                     'confidence': parsed_data.get('confidence_score', 0.8),
                     'message': 'Document parsed successfully with OpenAI'
                 }
+                cache.set(cache_key, result, timeout=_OPENAI_CACHE_TIMEOUT)
+                return result
             else:
                 return {
                     'success': False,
@@ -1526,7 +2557,7 @@ class LLMService:
                 }
                 
         except Exception as e:
-            logger.error(f"OpenAI API error: {str(e)}")
+            logger.error("OpenAI API error: %s", e)
             error_msg = str(e).lower()
             
             # Provide specific error messages for common OpenAI API issues
@@ -1572,11 +2603,7 @@ class LLMService:
                     'success': False,
                     'error': 'AI service connection failed',
                     'details': 'Could not connect to OpenAI API',
-                    'suggestions': [
-                        'Check your internet connection',
-                        'Try again in a few minutes',
-                        'Contact support if problem persists'
-                    ],
+                    'suggestions': list(_SUGG_NETWORK_OR_SUPPORT),
                     'retry_allowed': True,
                     'data': {}
                 }
@@ -1585,89 +2612,28 @@ class LLMService:
                     'success': False,
                     'error': 'AI service error',
                     'details': f'Unexpected error from OpenAI API: {str(e)}',
-                    'suggestions': [
-                        'Try again in a few minutes',
-                        'Try processing a different document',
-                        'Contact support if problem persists'
-                    ],
+                    'suggestions': list(_SUGG_AI_RETRY),
                     'retry_allowed': True,
                     'data': {}
                 }
     
     def _build_parsing_prompt(self, text: str, document_type: str) -> str:
-        """Build structured prompt for LLM parsing"""
-        
-        base_prompt = f"""
-Analyze the following {document_type} text and extract structured banking information. 
-Return ONLY valid JSON with the following structure:
-
-{{
-    "document_type": "detected document type",
-    "confidence_score": 0.0-1.0,
-    "personal_information": {{
-        "full_name": "extracted name or null",
-        "account_number": "account number or null",
-        "customer_id": "customer ID or null",
-        "address": "full address or null",
-        "phone": "phone number or null",
-        "email": "email address or null"
-    }},
-    "financial_data": {{
-        "account_balance": "current balance or null",
-        "available_balance": "available balance or null",
-        "transactions": [
-            {{
-                "date": "transaction date",
-                "description": "transaction description",
-                "amount": "amount with sign",
-                "type": "debit/credit/transfer"
-            }}
-        ],
-        "monthly_summary": {{
-            "total_deposits": "total deposits or null",
-            "total_withdrawals": "total withdrawals or null",
-            "fees_charged": "fees charged or null"
-        }}
-    }},
-    "loan_information": {{
-        "loan_amount": "loan amount or null",
-        "interest_rate": "interest rate or null",
-        "loan_term": "loan term or null",
-        "monthly_payment": "monthly payment or null",
-        "remaining_balance": "remaining balance or null"
-    }},
-    "dates": {{
-        "statement_date": "statement date or null",
-        "statement_period": "statement period or null",
-        "due_date": "payment due date or null"
-    }},
-    "bank_information": {{
-        "bank_name": "bank name or null",
-        "branch": "branch information or null",
-        "routing_number": "routing number or null",
-        "swift_code": "SWIFT code or null"
-    }},
-    "extracted_text_quality": {{
-        "clarity": "high/medium/low",
-        "completeness": "complete/partial/incomplete",
-        "issues": ["list of any issues found"]
-    }}
-}}
-
-Important instructions:
-1. Return ONLY the JSON object, no additional text
-2. Use null for missing information, don't make up data
-3. For amounts, include currency symbols if present
-4. For dates, use consistent format (YYYY-MM-DD if possible)
-5. Set confidence_score based on text clarity and completeness
-6. Extract ALL transactions found in the document
-7. Be precise with numbers and dates
-
+        """Build structured prompt for LLM parsing; only the tail varies between calls"""
+        return f"""{_PARSING_PROMPT_PREFIX}
+Document type: {document_type}
 Document text to analyze:
-{text}
-"""
-        
-        return base_prompt.strip()
+{text}"""
+    
+    def _build_multi_parsing_prompt(self, texts: List[str], document_type: str) -> str:
+        """Build one prompt that asks for every document's structure in a single response"""
+        documents = '\n\n'.join(
+            f"### DOCUMENT {number}\n{text}" for number, text in enumerate(texts, 1)
+        )
+        return f"""{_MULTI_PARSING_PROMPT_PREFIX}
+Document type: {document_type}
+Number of documents: {len(texts)}
+
+{documents}"""
     
     def _parse_llm_response(self, response_text: str) -> Optional[Dict[str, Any]]:
         """
@@ -1680,32 +2646,24 @@ Document text to analyze:
             dict: Parsed JSON data or None if parsing fails
         """
         try:
-            # Clean response text
-            cleaned_text = response_text.strip()
-            
-            # Try to find JSON in the response
-            json_start = cleaned_text.find('{')
-            json_end = cleaned_text.rfind('}') + 1
+            # Both providers run in JSON mode, so the whole reply is the object
+            parsed_data = json_loads(response_text)
+            if not isinstance(parsed_data, dict):
+                logger.warning("No JSON found in LLM response")
+                return None
             
-            if json_start >= 0 and json_end > json_start:
-                json_text = cleaned_text[json_start:json_end]
-                parsed_data = json.loads(json_text)
-                
-                # Validate required structure
-                if self._validate_parsed_data(parsed_data):
-                    return parsed_data
-                else:
-                    logger.warning("Parsed data failed validation")
-                    return None
+            # Validate required structure
+            if self._validate_parsed_data(parsed_data):
+                return parsed_data
             else:
-                logger.warning("No JSON found in LLM response")
+                logger.warning("Parsed data failed validation")
                 return None
                 
         except json.JSONDecodeError as e:
-            logger.error(f"JSON parsing error: {str(e)}")
+            logger.error("JSON parsing error: %s", e)
             return None
         except Exception as e:
-            logger.error(f"Response parsing error: {str(e)}")
+            logger.error("Response parsing error: %s", e)
             return None
     
     def _validate_parsed_data(self, data: Dict[str, Any]) -> bool:
@@ -1718,129 +2676,268 @@ Document text to analyze:
         Returns:
             bool: True if data structure is valid
         """
-        required_keys = [
-            'document_type',
-            'confidence_score',
-            'personal_information',
-            'financial_data',
-            'dates',
-            'bank_information'
-        ]
-        
         try:
             # Check top-level keys
-            for key in required_keys:
-                if key not in data:
-                    logger.warning(f"Missing required key: {key}")
-                    return False
+            missing = _REQUIRED_PARSE_KEYS - data.keys()
+            if missing:
+                logger.warning("Missing required keys: %s", sorted(missing))
+                return False
             
             # Check confidence score is valid
             confidence = data.get('confidence_score', 0)
             if not isinstance(confidence, (int, float)) or confidence < 0 or confidence > 1:
-                logger.warning(f"Invalid confidence score: {confidence}")
+                logger.warning("Invalid confidence score: %s", confidence)
                 return False
             
             # Check that nested objects are dictionaries
-            nested_objects = ['personal_information', 'financial_data', 'dates', 'bank_information']
-            for obj_key in nested_objects:
-                if not isinstance(data.get(obj_key), dict):
-                    logger.warning(f"Invalid nested object: {obj_key}")
-                    return False
+            invalid = [key for key in _NESTED_PARSE_KEYS if not isinstance(data[key], dict)]
+            if invalid:
+                logger.warning("Invalid nested objects: %s", invalid)
+                return False
             
             return True
             
         except Exception as e:
-            logger.error(f"Data validation error: {str(e)}")
+            logger.error("Data validation error: %s", e)
             return False
     
     def test_api_connection(self) -> Dict[str, Any]:
         """
         Test LLM API connections
         
+        Both providers are probed concurrently. Successes are cached through the live
+        service's _cached_probe, so bursts of health checks don't re-query them.
+        
         Returns:
             dict: Status of API connections
         """
-        results = {
-            'gemini': {'available': False, 'error': None},
-            'openai': {'available': False, 'error': None}
+        futures = {
+            'gemini': _llm_executor().submit(_cached_probe, 'gemini', self._probe_gemini),
+            'openai': _llm_executor().submit(_cached_probe, 'openai', self._probe_openai),
         }
-        
-        # Test Gemini
-        if self.gemini_client:
-            try:
-                test_response = self.gemini_client.generate_content("Test connection. Respond with 'OK'.")
-                if test_response.text and 'OK' in test_response.text:
-                    results['gemini']['available'] = True
-                else:
-                    results['gemini']['error'] = 'Unexpected response'
-            except Exception as e:
-                results['gemini']['error'] = str(e)
-        else:
-            results['gemini']['error'] = 'API key not configured'
-        
-        # Test OpenAI
-        if self.openai_client:
-            try:
-                test_response = self.openai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": "Test connection. Respond with 'OK'."}],
-                    max_tokens=10
-                )
-                if test_response.choices[0].message.content and 'OK' in test_response.choices[0].message.content:
-                    results['openai']['available'] = True
-                else:
-                    results['openai']['error'] = 'Unexpected response'
-            except Exception as e:
-                results['openai']['error'] = str(e)
-        else:
-            results['openai']['error'] = 'API key not configured'
-        
-        return results
+        return {provider: future.result() for provider, future in futures.items()}
+    
+    def _probe_gemini(self) -> Dict[str, Any]:
+        """Send a minimal request to Gemini"""
+        if not self.gemini_client:
+            return {'available': False, 'error': 'API key not configured'}
+        try:
+            test_response = self.gemini_client.generate_content("Test connection. Respond with 'OK'.")
+            if test_response.text and 'OK' in test_response.text:
+                return {'available': True, 'error': None}
+            return {'available': False, 'error': 'Unexpected response'}
+        except Exception as e:
+            return {'available': False, 'error': str(e)}
+    
+    def _probe_openai(self) -> Dict[str, Any]:
+        """Send a minimal request to OpenAI"""
+        if not self.openai_client:
+            return {'available': False, 'error': 'API key not configured'}
+        try:
+            test_response = self.openai_client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[{"role": "user", "content": "Test connection. Respond with 'OK'."}],
+                max_tokens=10
+            )
+            content = test_response.choices[0].message.content
+            if content and 'OK' in content:
+                return {'available': True, 'error': None}
+            return {'available': False, 'error': 'Unexpected response'}
+        except Exception as e:
+            return {'available': False, 'error': str(e)}
+
+
+# Strips currency symbols, separators and labels from amount strings
+_AMOUNT_CLEAN_RE = re.compile(r'[^\d.-]')
+_CENTS = Decimal('0.01')
+
+# Fields a transaction needs to count as valid; checked once per transaction while formatting
+_TXN_REQUIRED_FIELDS = ('date', 'description', 'amount')
+
+# Structuring is a pure function of the parsed data, so repeat requests for the same
+# document (e.g. re-downloading its outputs) reuse the earlier result
+_STRUCTURED_CACHE_TIMEOUT = 3600
+
+
+def _structured_cache_key(parsed_data: Dict[str, Any]) -> Optional[str]:
+    """Stable key for parsed_data, or None if it cannot be serialized"""
+    try:
+        if orjson is not None:
+            payload = orjson.dumps(parsed_data, option=orjson.OPT_SORT_KEYS)
+        else:  # pragma: no cover
+            payload = json.dumps(parsed_data, sort_keys=True).encode()
+    except TypeError:
+        return None
+    return f"parser:structured:{hashlib.blake2b(payload, digest_size=16).hexdigest()}"
+
+
+@functools.lru_cache(maxsize=4096, typed=True)
+def _format_amount_text(amount_str: Any) -> str:
+    """
+    Display form of one amount, e.g. "$1,234.57"
+    
+    Cached because statements repeat the same amounts (fees, standing orders) many
+    times; typed so True and 1 don't share an entry.
+    """
+    if isinstance(amount_str, (int, float)) and not isinstance(amount_str, bool):
+        # JSON-mode replies often carry amounts as numbers already; str() keeps the
+        # shortest decimal form, so floats don't pick up binary rounding noise
+        amount_clean = str(amount_str)
+    elif not amount_str or not str(amount_str).strip():
+        return ''
+    else:
+        # Try to extract numeric value and format it
+        amount_clean = _AMOUNT_CLEAN_RE.sub('', str(amount_str))
+    
+    try:
+        amount = Decimal(amount_clean).quantize(_CENTS, rounding=ROUND_HALF_UP)
+        return f"${amount:,}"
+    except InvalidOperation:
+        return str(amount_str)  # Return original if can't parse
 
 
 class DataStructuringService:
     """Service for organizing and formatting extracted banking data"""
     
+    # (source key, display label) pairs, in display order
+    _PERSONAL_SCHEMA = (
+        ('full_name', 'Full Name'),
+        ('account_number', 'Account Number'),
+        ('customer_id', 'Customer ID'),
+        ('address', 'Address'),
+        ('phone', 'Phone Number'),
+        ('email', 'Email Address'),
+    )
+    _BALANCE_SCHEMA = (
+        ('account_balance', 'Current Balance'),
+        ('available_balance', 'Available Balance'),
+    )
+    _MONTHLY_SCHEMA = (
+        ('total_deposits', 'Total Deposits'),
+        ('total_withdrawals', 'Total Withdrawals'),
+        ('fees_charged', 'Fees Charged'),
+    )
+    _LOAN_SCHEMA = (
+        ('loan_amount', 'Loan Amount'),
+        ('interest_rate', 'Interest Rate'),
+        ('loan_term', 'Loan Term'),
+        ('monthly_payment', 'Monthly Payment'),
+        ('remaining_balance', 'Remaining Balance'),
+    )
+    _BANK_SCHEMA = (
+        ('bank_name', 'Bank Name'),
+        ('branch', 'Branch'),
+        ('routing_number', 'Routing Number'),
+        ('swift_code', 'SWIFT Code'),
+    )
+    _DATES_SCHEMA = (
+        ('statement_date', 'Statement Date'),
+        ('statement_period', 'Statement Period'),
+        ('due_date', 'Payment Due Date'),
+    )
+    
+    # Leaf fields counted by _assess_data_quality, grouped by top-level section
+    _QUALITY_SECTIONS = (
+        ('personal_information', tuple(key for key, _ in _PERSONAL_SCHEMA)),
+        ('financial_data', tuple(key for key, _ in _BALANCE_SCHEMA) + ('transactions', 'monthly_summary')),
+        ('bank_information', tuple(key for key, _ in _BANK_SCHEMA)),
+        ('dates', tuple(key for key, _ in _DATES_SCHEMA)),
+    )
+    _QUALITY_PATHS = tuple((section, key) for section, keys in _QUALITY_SECTIONS for key in keys)
+    
     def __init__(self):
         pass
     
-    def structure_banking_data(self, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def _format_section(data: Dict[str, Any], schema: tuple, type_tag: str) -> List[Dict[str, str]]:
+        """Format the non-empty fields of one section as {field, value, type} rows"""
+        return [
+            {'field': label, 'value': str(value), 'type': type_tag}
+            for key, label in schema
+            if (value := data.get(key)) and str(value).strip()
+        ]
+    
+    def structure_banking_data(self, parsed_data: Dict[str, Any],
+                               formatted_transactions: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Structure and format parsed banking data for display and export
         
         Args:
             parsed_data: Raw parsed data from LLM
+            formatted_transactions: Transactions already run through _format_transaction
+                while the reply streamed in; ignored unless they match parsed_data's count
             
         Returns:
             dict: Structured data with formatting and validation
         """
+        cache_key = _structured_cache_key(parsed_data)
+        if cache_key is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return self._stamp_processing_time(cached)
+        
         try:
+            # Look every section up once; each output below is built from these
+            personal_data = parsed_data.get('personal_information', {})
+            financial_data = parsed_data.get('financial_data', {})
+            dates_data = parsed_data.get('dates', {})
+            raw_transactions = financial_data.get('transactions', [])
+            
+            personal_info = self._format_personal_info(personal_data)
+            financial_summary = self._format_financial_summary(financial_data)
+            if formatted_transactions is not None and len(formatted_transactions) == len(raw_transactions):
+                transactions = formatted_transactions
+            else:
+                transactions = self._format_transactions(raw_transactions)
+            bank_details = self._format_bank_info(parsed_data.get('bank_information', {}))
+            important_dates = self._format_dates(dates_data)
+            
             structured_data = {
                 'metadata': {
                     'document_type': parsed_data.get('document_type', 'Unknown'),
                     'confidence_score': parsed_data.get('confidence_score', 0.0),
-                    'processing_timestamp': datetime.now().isoformat(),
+                    'processing_timestamp': None,  # stamped per call, after caching
                     'data_quality': self._assess_data_quality(parsed_data)
                 },
-                'summary': self._create_summary(parsed_data),
-                'personal_info': self._format_personal_info(parsed_data.get('personal_information', {})),
-                'financial_summary': self._format_financial_summary(parsed_data.get('financial_data', {})),
-                'transactions': self._format_transactions(parsed_data.get('financial_data', {}).get('transactions', [])),
+                'summary': {
+                    'account_holder': personal_data.get('full_name'),
+                    'account_number': personal_data.get('account_number'),
+                    'current_balance': financial_data.get('account_balance'),
+                    'transaction_count': len(raw_transactions),
+                    'document_type': parsed_data.get('document_type'),
+                    'statement_date': dates_data.get('statement_date')
+                },
+                'personal_info': personal_info,
+                'financial_summary': financial_summary,
+                'transactions': transactions,
                 'loan_details': self._format_loan_info(parsed_data.get('loan_information', {})),
-                'bank_details': self._format_bank_info(parsed_data.get('bank_information', {})),
-                'important_dates': self._format_dates(parsed_data.get('dates', {})),
-                'display_tables': self._create_display_tables(parsed_data),
-                'validation_results': self._validate_extracted_data(parsed_data)
+                'bank_details': bank_details,
+                'important_dates': important_dates,
+                # The display tables are the sections above, not a second formatting pass
+                'display_tables': {
+                    'personal_info_table': personal_info,
+                    'financial_summary_table': financial_summary,
+                    'transactions_table': transactions,
+                    'bank_info_table': bank_details,
+                    'dates_table': important_dates
+                },
+                'validation_results': self._validate_extracted_data(
+                    parsed_data, personal_data, len(raw_transactions),
+                    sum(1 for transaction in transactions if transaction['is_valid'])
+                )
             }
             
-            return {
+            result = {
                 'success': True,
                 'data': structured_data,
                 'message': 'Data structured successfully'
             }
+            if cache_key is not None:
+                cache.set(cache_key, result, timeout=_STRUCTURED_CACHE_TIMEOUT)
+            return self._stamp_processing_time(result)
             
         except Exception as e:
-            logger.error(f"Data structuring failed: {str(e)}")
+            logger.error("Data structuring failed: %s", e)
             return {
                 'success': False,
                 'error': 'Data structuring failed',
@@ -1848,21 +2945,28 @@ class DataStructuringService:
                 'data': {}
             }
     
+    @staticmethod
+    def _stamp_processing_time(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Set the current time on a structuring result; cached results are stored without one"""
+        result['data']['metadata']['processing_timestamp'] = datetime.now().isoformat()
+        return result
+    
     def _assess_data_quality(self, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
         """Assess the quality of extracted data"""
         quality_info = parsed_data.get('extracted_text_quality', {})
         
-        # Count non-null fields
-        total_fields = 0
+        # Count non-null fields against the fixed schema, so absent sections count as empty
+        total_fields = len(self._QUALITY_PATHS)
         filled_fields = 0
         
-        for section in ['personal_information', 'financial_data', 'bank_information', 'dates']:
-            section_data = parsed_data.get(section, {})
-            if isinstance(section_data, dict):
-                for key, value in section_data.items():
-                    total_fields += 1
-                    if value is not None and str(value).strip():
-                        filled_fields += 1
+        for section, keys in self._QUALITY_SECTIONS:
+            section_data = parsed_data.get(section)
+            if not isinstance(section_data, dict):
+                continue
+            for key in keys:
+                value = section_data.get(key)
+                if value is not None and value != '' and (not isinstance(value, str) or value.strip()):
+                    filled_fields += 1
         
         completeness_score = filled_fields / total_fields if total_fields > 0 else 0
         
@@ -1875,208 +2979,85 @@ class DataStructuringService:
             'issues': quality_info.get('issues', [])
         }
     
-    def _create_summary(self, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a high-level summary of the document"""
-        personal_info = parsed_data.get('personal_information', {})
-        financial_data = parsed_data.get('financial_data', {})
-        
-        return {
-            'account_holder': personal_info.get('full_name'),
-            'account_number': personal_info.get('account_number'),
-            'current_balance': financial_data.get('account_balance'),
-            'transaction_count': len(financial_data.get('transactions', [])),
-            'document_type': parsed_data.get('document_type'),
-            'statement_date': parsed_data.get('dates', {}).get('statement_date')
-        }
-    
     def _format_personal_info(self, personal_data: Dict[str, Any]) -> List[Dict[str, str]]:
         """Format personal information as key-value pairs"""
-        formatted_info = []
-        
-        field_labels = {
-            'full_name': 'Full Name',
-            'account_number': 'Account Number',
-            'customer_id': 'Customer ID',
-            'address': 'Address',
-            'phone': 'Phone Number',
-            'email': 'Email Address'
-        }
-        
-        for field, label in field_labels.items():
-            value = personal_data.get(field)
-            if value and str(value).strip():
-                formatted_info.append({
-                    'field': label,
-                    'value': str(value),
-                    'type': 'personal'
-                })
-        
-        return formatted_info
+        return self._format_section(personal_data, self._PERSONAL_SCHEMA, 'personal')
     
     def _format_financial_summary(self, financial_data: Dict[str, Any]) -> List[Dict[str, str]]:
         """Format financial summary information"""
-        formatted_summary = []
-        
-        # Account balances
-        balance_fields = {
-            'account_balance': 'Current Balance',
-            'available_balance': 'Available Balance'
-        }
-        
-        for field, label in balance_fields.items():
-            value = financial_data.get(field)
-            if value and str(value).strip():
-                formatted_summary.append({
-                    'field': label,
-                    'value': str(value),
-                    'type': 'balance'
-                })
-        
-        # Monthly summary
-        monthly_summary = financial_data.get('monthly_summary', {})
-        monthly_fields = {
-            'total_deposits': 'Total Deposits',
-            'total_withdrawals': 'Total Withdrawals',
-            'fees_charged': 'Fees Charged'
-        }
-        
-        for field, label in monthly_fields.items():
-            value = monthly_summary.get(field)
-            if value and str(value).strip():
-                formatted_summary.append({
-                    'field': label,
-                    'value': str(value),
-                    'type': 'monthly_summary'
-                })
-        
-        return formatted_summary
+        return (
+            self._format_section(financial_data, self._BALANCE_SCHEMA, 'balance')
+            + self._format_section(financial_data.get('monthly_summary', {}), self._MONTHLY_SCHEMA, 'monthly_summary')
+        )
     
     def _format_transactions(self, transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Format transaction data with validation"""
-        formatted_transactions = []
-        
-        for i, transaction in enumerate(transactions):
-            if not isinstance(transaction, dict):
-                continue
-            
-            formatted_transaction = {
-                'id': i + 1,
-                'date': transaction.get('date', ''),
-                'description': transaction.get('description', ''),
-                'amount': transaction.get('amount', ''),
-                'type': transaction.get('type', ''),
-                'formatted_amount': self._format_amount(transaction.get('amount', '')),
-                'is_valid': self._validate_transaction(transaction)
-            }
-            
-            formatted_transactions.append(formatted_transaction)
+        format_transaction = self._format_transaction
+        return [
+            format_transaction(i, transaction)
+            for i, transaction in enumerate(transactions)
+            if isinstance(transaction, dict)
+        ]
+    
+    def _format_transaction(self, index: int, transaction: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Format a single transaction; index is its zero-based position in the document
         
-        return formatted_transactions
+        is_valid is computed here once; structure_banking_data's validation counts these
+        flags instead of re-checking each transaction.
+        """
+        amount = transaction.get('amount', '')
+        return {
+            'id': index + 1,
+            'date': transaction.get('date', ''),
+            'description': transaction.get('description', ''),
+            'amount': amount,
+            'type': transaction.get('type', ''),
+            'formatted_amount': self._format_amount(amount),
+            'is_valid': self._validate_transaction(transaction)
+        }
     
     def _format_loan_info(self, loan_data: Dict[str, Any]) -> List[Dict[str, str]]:
         """Format loan information"""
-        formatted_loan = []
-        
-        loan_fields = {
-            'loan_amount': 'Loan Amount',
-            'interest_rate': 'Interest Rate',
-            'loan_term': 'Loan Term',
-            'monthly_payment': 'Monthly Payment',
-            'remaining_balance': 'Remaining Balance'
-        }
-        
-        for field, label in loan_fields.items():
-            value = loan_data.get(field)
-            if value and str(value).strip():
-                formatted_loan.append({
-                    'field': label,
-                    'value': str(value),
-                    'type': 'loan'
-                })
-        
-        return formatted_loan
+        return self._format_section(loan_data, self._LOAN_SCHEMA, 'loan')
     
     def _format_bank_info(self, bank_data: Dict[str, Any]) -> List[Dict[str, str]]:
         """Format bank information"""
-        formatted_bank = []
-        
-        bank_fields = {
-            'bank_name': 'Bank Name',
-            'branch': 'Branch',
-            'routing_number': 'Routing Number',
-            'swift_code': 'SWIFT Code'
-        }
-        
-        for field, label in bank_fields.items():
-            value = bank_data.get(field)
-            if value and str(value).strip():
-                formatted_bank.append({
-                    'field': label,
-                    'value': str(value),
-                    'type': 'bank'
-                })
-        
-        return formatted_bank
+        return self._format_section(bank_data, self._BANK_SCHEMA, 'bank')
     
     def _format_dates(self, dates_data: Dict[str, Any]) -> List[Dict[str, str]]:
         """Format important dates"""
-        formatted_dates = []
-        
-        date_fields = {
-            'statement_date': 'Statement Date',
-            'statement_period': 'Statement Period',
-            'due_date': 'Payment Due Date'
-        }
-        
-        for field, label in date_fields.items():
-            value = dates_data.get(field)
-            if value and str(value).strip():
-                formatted_dates.append({
-                    'field': label,
-                    'value': str(value),
-                    'type': 'date'
-                })
-        
-        return formatted_dates
-    
-    def _create_display_tables(self, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create formatted tables for UI display"""
-        return {
-            'personal_info_table': self._format_personal_info(parsed_data.get('personal_information', {})),
-            'financial_summary_table': self._format_financial_summary(parsed_data.get('financial_data', {})),
-            'transactions_table': self._format_transactions(parsed_data.get('financial_data', {}).get('transactions', [])),
-            'bank_info_table': self._format_bank_info(parsed_data.get('bank_information', {})),
-            'dates_table': self._format_dates(parsed_data.get('dates', {}))
-        }
+        return self._format_section(dates_data, self._DATES_SCHEMA, 'date')
     
     def _format_amount(self, amount_str: str) -> str:
         """Format amount string for display"""
-        if not amount_str or not str(amount_str).strip():
-            return ''
-        
-        # Try to extract numeric value and format it
-        import re
-        amount_clean = re.sub(r'[^\d.-]', '', str(amount_str))
-        
         try:
-            amount_float = float(amount_clean)
-            return f"${amount_float:,.2f}"
-        except ValueError:
-            return str(amount_str)  # Return original if can't parse
+            return _format_amount_text(amount_str)
+        except TypeError:  # unhashable value; format it without the cache
+            return _format_amount_text.__wrapped__(amount_str)
     
-    def _validate_transaction(self, transaction: Dict[str, Any]) -> bool:
+    @staticmethod
+    def _validate_transaction(transaction: Dict[str, Any]) -> bool:
         """Validate transaction data"""
-        required_fields = ['date', 'description', 'amount']
-        
-        for field in required_fields:
-            value = transaction.get(field)
-            if not value or not str(value).strip():
-                return False
-        
-        return True
+        return all(
+            (value := transaction.get(field)) and str(value).strip()
+            for field in _TXN_REQUIRED_FIELDS
+        )
     
-    def _validate_extracted_data(self, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate all extracted data and provide feedback"""
+    def _validate_extracted_data(self, parsed_data: Dict[str, Any], personal_info: Dict[str, Any],
+                                 transaction_count: int, valid_transaction_count: int) -> Dict[str, Any]:
+        """
+        Validate all extracted data and provide feedback
+        
+        Args:
+            parsed_data: Raw parsed data from LLM
+            personal_info: Its personal_information section
+            transaction_count: Number of transactions it lists
+            valid_transaction_count: How many of them passed _validate_transaction
+            
+        Returns:
+            dict: Overall validity plus any issues and warnings
+        """
         validation_results = {
             'overall_valid': True,
             'issues': [],
@@ -2085,23 +3066,18 @@ class DataStructuringService:
         }
         
         # Validate personal information
-        personal_info = parsed_data.get('personal_information', {})
         if not personal_info.get('full_name'):
             validation_results['warnings'].append('No account holder name found')
         
         if not personal_info.get('account_number'):
             validation_results['warnings'].append('No account number found')
         
-        # Validate financial data
-        financial_data = parsed_data.get('financial_data', {})
-        transactions = financial_data.get('transactions', [])
-        
-        if not transactions:
+        # Validate financial data; entries that are not objects count as invalid
+        if not transaction_count:
             validation_results['warnings'].append('No transactions found')
-        else:
-            invalid_transactions = [t for t in transactions if not self._validate_transaction(t)]
-            if invalid_transactions:
-                validation_results['issues'].append(f'{len(invalid_transactions)} invalid transactions found')
+        elif valid_transaction_count < transaction_count:
+            invalid_count = transaction_count - valid_transaction_count
+            validation_results['issues'].append(f'{invalid_count} invalid transactions found')
         
         # Check confidence score
         confidence = parsed_data.get('confidence_score', 0)
@@ -2141,47 +3117,32 @@ class FileGenerationService:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         base_filename = f"banking_document_{session_key}_{timestamp}"
         
-        # Generate Excel file
-        try:
-            excel_generator = ExcelGenerator()
-            excel_path = excel_generator.generate_excel(structured_data, base_filename, self.temp_dir)
-            results['files']['excel'] = {
-                'path': excel_path,
-                'filename': os.path.basename(excel_path),
-                'size': os.path.getsize(excel_path) if os.path.exists(excel_path) else 0
-            }
-        except Exception as e:
-            logger.error(f"Excel generation failed: {str(e)}")
-            results['errors'].append(f"Excel generation failed: {str(e)}")
-            results['success'] = False
-        
-        # Generate PDF file
-        try:
-            pdf_generator = PDFGenerator()
-            pdf_path = pdf_generator.generate_pdf(structured_data, base_filename, self.temp_dir)
-            results['files']['pdf'] = {
-                'path': pdf_path,
-                'filename': os.path.basename(pdf_path),
-                'size': os.path.getsize(pdf_path) if os.path.exists(pdf_path) else 0
-            }
-        except Exception as e:
-            logger.error(f"PDF generation failed: {str(e)}")
-            results['errors'].append(f"PDF generation failed: {str(e)}")
-            results['success'] = False
+        # The three files are independent, so render them side by side; openpyxl, reportlab
+        # and python-docx spend much of their time in zlib and file writes, which release the GIL
+        generators = [
+            ('excel', 'Excel', ExcelGenerator().generate_excel),
+            ('pdf', 'PDF', PDFGenerator().generate_pdf),
+            ('doc', 'DOC', DOCGenerator().generate_doc),
+        ]
+        with ThreadPoolExecutor(max_workers=len(generators)) as executor:
+            futures = [
+                (format_type, label, executor.submit(generate, structured_data, base_filename, self.temp_dir))
+                for format_type, label, generate in generators
+            ]
         
-        # Generate DOC file
-        try:
-            doc_generator = DOCGenerator()
-            doc_path = doc_generator.generate_doc(structured_data, base_filename, self.temp_dir)
-            results['files']['doc'] = {
-                'path': doc_path,
-                'filename': os.path.basename(doc_path),
-                'size': os.path.getsize(doc_path) if os.path.exists(doc_path) else 0
-            }
-        except Exception as e:
-            logger.error(f"DOC generation failed: {str(e)}")
-            results['errors'].append(f"DOC generation failed: {str(e)}")
-            results['success'] = False
+        # Collected in submission order so files and errors keep a stable order
+        for format_type, label, future in futures:
+            try:
+                path = future.result()
+                results['files'][format_type] = {
+                    'path': path,
+                    'filename': os.path.basename(path),
+                    'size': os.path.getsize(path) if os.path.exists(path) else 0
+                }
+            except Exception as e:
+                logger.error("%s generation failed: %s", label, e)
+                results['errors'].append(f"{label} generation failed: {str(e)}")
+                results['success'] = False
         
         return results
     
@@ -2192,7 +3153,7 @@ class FileGenerationService:
                 if os.path.exists(file_path):
                     os.remove(file_path)
             except Exception as e:
-                logger.warning(f"Failed to cleanup file {file_path}: {str(e)}")
+                logger.warning("Failed to cleanup file %s: %s", file_path, e)
 
 
 class ExcelGenerator:
@@ -2210,126 +3171,102 @@ class ExcelGenerator:
         Returns:
             str: Path to generated Excel file
         """
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Banking Document Data"
-        
-        # Define styles
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center")
-        
-        data_alignment = Alignment(horizontal="left", vertical="center")
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        current_row = 1
-        
-        # Add document header
-        ws.merge_cells(f'A{current_row}:D{current_row}')
-        ws[f'A{current_row}'] = "Banking Document Analysis Report"
-        ws[f'A{current_row}'].font = Font(bold=True, size=16)
-        ws[f'A{current_row}'].alignment = Alignment(horizontal="center")
-        current_row += 2
+        # Write-only workbook: rows stream straight to XML instead of living as Cell objects.
+        # Column widths must be set before the first append, so the rows are laid out first.
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Banking Document Data")
         
-        # Add generation timestamp
-        ws[f'A{current_row}'] = f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        ws[f'A{current_row}'].font = Font(italic=True)
-        current_row += 2
+        lines = [
+            ('title', ["Banking Document Analysis Report"]),
+            (None, []),
+            ('subtitle', [f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"]),
+            (None, []),
+        ]
         
         # Personal Information Section
-        current_row = self._add_section_to_excel(
-            ws, "Personal Information", 
-            data.get('personal_information', {}),
-            current_row, header_font, header_fill, header_alignment, data_alignment, border
-        )
+        self._add_section_to_excel(lines, "Personal Information", data.get('personal_information', {}))
         
         # Financial Data Section
         financial_data = data.get('financial_data', {})
         if financial_data:
-            current_row = self._add_section_to_excel(
-                ws, "Financial Summary",
-                {
-                    'Account Balance': financial_data.get('account_balance', 'N/A'),
-                    'Available Balance': financial_data.get('available_balance', 'N/A'),
-                    'Total Deposits': financial_data.get('monthly_summary', {}).get('total_deposits', 'N/A'),
-                    'Total Withdrawals': financial_data.get('monthly_summary', {}).get('total_withdrawals', 'N/A'),
-                    'Fees Charged': financial_data.get('monthly_summary', {}).get('fees_charged', 'N/A')
-                },
-                current_row, header_font, header_fill, header_alignment, data_alignment, border
-            )
+            monthly_summary = financial_data.get('monthly_summary', {})
+            self._add_section_to_excel(lines, "Financial Summary", {
+                'Account Balance': financial_data.get('account_balance', 'N/A'),
+                'Available Balance': financial_data.get('available_balance', 'N/A'),
+                'Total Deposits': monthly_summary.get('total_deposits', 'N/A'),
+                'Total Withdrawals': monthly_summary.get('total_withdrawals', 'N/A'),
+                'Fees Charged': monthly_summary.get('fees_charged', 'N/A')
+            })
         
         # Transactions Section
         transactions = financial_data.get('transactions', [])
         if transactions:
-            current_row += 1
-            
-            # Transactions header
-            ws[f'A{current_row}'] = "Transaction History"
-            ws[f'A{current_row}'].font = Font(bold=True, size=14)
-            current_row += 1
-            
-            # Transaction table headers
-            headers = ['Date', 'Description', 'Amount', 'Type']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=current_row, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-                cell.border = border
-            
-            current_row += 1
-            
-            # Transaction data
-            for transaction in transactions:
-                row_data = [
+            lines.append((None, []))
+            lines.append(('section', ["Transaction History"]))
+            lines.append(('header', ['Date', 'Description', 'Amount', 'Type']))
+            lines.extend(
+                ('data', [
                     transaction.get('date', ''),
                     transaction.get('description', ''),
                     transaction.get('amount', ''),
                     transaction.get('type', '')
-                ]
-                
-                for col, value in enumerate(row_data, 1):
-                    cell = ws.cell(row=current_row, column=col, value=value)
-                    cell.alignment = data_alignment
-                    cell.border = border
-                
-                current_row += 1
+                ])
+                for transaction in transactions
+            )
         
         # Bank Information Section
         bank_info = data.get('bank_information', {})
         if bank_info:
-            current_row = self._add_section_to_excel(
-                ws, "Bank Information",
-                bank_info,
-                current_row, header_font, header_fill, header_alignment, data_alignment, border
-            )
+            self._add_section_to_excel(lines, "Bank Information", bank_info)
         
         # Dates Section
         dates_info = data.get('dates', {})
         if dates_info:
-            current_row = self._add_section_to_excel(
-                ws, "Important Dates",
-                dates_info,
-                current_row, header_font, header_fill, header_alignment, data_alignment, border
-            )
+            self._add_section_to_excel(lines, "Important Dates", dates_info)
+        
+        # Auto-adjust column widths, capped at 50 characters
+        widths = {}
+        for _style, values in lines:
+            for col, value in enumerate(values, 1):
+                if value is not None:
+                    widths[col] = max(widths.get(col, 0), len(str(value)))
+        for col, max_length in widths.items():
+            ws.column_dimensions[get_column_letter(col)].width = min(max_length + 2, 50)
+        
+        # Styles are built once and shared by every cell that uses them
+        border = Border(
+            left=Side(style='thin'),
+            right=Side(style='thin'),
+            top=Side(style='thin'),
+            bottom=Side(style='thin')
+        )
+        styles = {
+            'title': {'font': Font(bold=True, size=16)},
+            'subtitle': {'font': Font(italic=True)},
+            'section': {'font': Font(bold=True, size=14)},
+            'header': {
+                'font': Font(bold=True, color="FFFFFF"),
+                'fill': PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+                'alignment': Alignment(horizontal="center", vertical="center"),
+                'border': border
+            },
+            'data': {
+                'alignment': Alignment(horizontal="left", vertical="center"),
+                'border': border
+            },
+        }
         
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)  # Cap at 50 characters
-            ws.column_dimensions[column_letter].width = adjusted_width
+        for style, values in lines:
+            if style is None:
+                ws.append(values)
+                continue
+            cells = []
+            for value in values:
+                cell = WriteOnlyCell(ws, value=value)
+                for attribute, style_value in styles[style].items():
+                    setattr(cell, attribute, style_value)
+                cells.append(cell)
+            ws.append(cells)
         
         # Save file
         output_path = os.path.join(output_dir, f"{base_filename}.xlsx")
@@ -2337,47 +3274,17 @@ class ExcelGenerator:
         
         return output_path
     
-    def _add_section_to_excel(self, ws, section_title: str, section_data: Dict[str, Any], 
-                             start_row: int, header_font, header_fill, header_alignment, 
-                             data_alignment, border) -> int:
-        """Add a data section to Excel worksheet"""
-        current_row = start_row + 1
+    def _add_section_to_excel(self, lines: List[Tuple[Optional[str], List[Any]]],
+                              section_title: str, section_data: Dict[str, Any]):
+        """Lay out a field/value section as (style, values) rows appended to lines"""
+        lines.append((None, []))
+        lines.append(('section', [section_title]))
+        lines.append(('header', ["Field", "Value"]))
         
-        # Section title
-        ws[f'A{current_row}'] = section_title
-        ws[f'A{current_row}'].font = Font(bold=True, size=14)
-        current_row += 1
-        
-        # Section headers
-        ws[f'A{current_row}'] = "Field"
-        ws[f'B{current_row}'] = "Value"
-        
-        for col in ['A', 'B']:
-            cell = ws[f'{col}{current_row}']
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-            cell.border = border
-        
-        current_row += 1
-        
-        # Section data
         for key, value in section_data.items():
             if value is not None and str(value).strip():
                 # Format field name (convert snake_case to Title Case)
-                field_name = key.replace('_', ' ').title()
-                
-                ws[f'A{current_row}'] = field_name
-                ws[f'B{current_row}'] = str(value)
-                
-                for col in ['A', 'B']:
-                    cell = ws[f'{col}{current_row}']
-                    cell.alignment = data_alignment
-                    cell.border = border
-                
-                current_row += 1
-        
-        return current_row
+                lines.append(('data', [_pretty(key), str(value)]))
 
 
 class PDFGenerator:
@@ -2533,7 +3440,7 @@ class PDFGenerator:
         
         for key, value in data_dict.items():
             if value is not None and str(value).strip():
-                field_name = key.replace('_', ' ').title()
+                field_name = _pretty(key)
                 table_data.append([field_name, str(value)])
         
         return table_data if len(table_data) > 1 else []
@@ -2694,6 +3601,6 @@ class DOCGenerator:
         # Add data rows
         for key, value in filtered_data.items():
             row_cells = table.add_row().cells
-            field_name = key.replace('_', ' ').title()
+            field_name = _pretty(key)
             row_cells[0].text = field_name
             row_cells[1].text = str(value)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from django.test import TestCase
 from django.core.exceptions import ValidationError
-from parser.models import UserSession, ProcessedDocument
+from parser.models import UserSession, ProcessedDocument, MaintenanceRun
 
 
 class UserSessionModelTest(TestCase):
@@ -46,6 +46,27 @@ class UserSessionModelTest(TestCase):
         self.assertEqual(active_count, 2)
 
 
+class MaintenanceRunModelTest(TestCase):
+    """Test cases for MaintenanceRun model"""
+    
+    def test_claim_once_per_interval(self):
+        """Test that a job can be claimed only once per interval"""
+        self.assertTrue(MaintenanceRun.claim('cleanup', 300))
+        self.assertFalse(MaintenanceRun.claim('cleanup', 300))
+        # Other jobs are tracked separately
+        self.assertTrue(MaintenanceRun.claim('other', 300))
+    
+    def test_claim_after_interval(self):
+        """Test that a job can be claimed again once the interval has passed"""
+        from datetime import timedelta
+        from django.utils import timezone
+        
+        MaintenanceRun.claim('cleanup', 300)
+        MaintenanceRun.objects.filter(name='cleanup').update(last_run=timezone.now() - timedelta(seconds=301))
+        
+        self.assertTrue(MaintenanceRun.claim('cleanup', 300))
+
+
 class ProcessedDocumentModelTest(TestCase):
     """Test cases for ProcessedDocument model"""
     
@@ -155,13 +176,23 @@ class ProcessedDocumentModelTest(TestCase):
 
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from django.core.cache import cache
 from django.contrib.sessions.models import Session
 from unittest.mock import patch, MagicMock
 import json
 import os
+import time
 
 from .forms import DocumentUploadForm
-from .services import SupabaseStorageService, SessionService
+from .services import SupabaseStorageService, SessionService, DataStructuringService, FileGenerationService, LLMService, _get_supabase, _collect_json_stream, _time_sortable_id
+from unittest import skipUnless
+
+try:
+    from . import services_backup
+except ImportError:  # pytesseract and openai are not in requirements.txt
+    services_backup = None
+
+requires_backup = skipUnless(services_backup, "services_backup dependencies are not installed")
 
 
 class DocumentUploadFormTest(TestCase):
@@ -378,6 +409,9 @@ class SupabaseStorageServiceTest(TestCase):
     
     @patch('parser.services.create_client')
     def setUp(self, mock_create_client):
+        _get_supabase.cache_clear()
+        self.addCleanup(_get_supabase.cache_clear)
+        cache.clear()
         self.mock_supabase = MagicMock()
         mock_create_client.return_value = self.mock_supabase
         self.storage_service = SupabaseStorageService()
@@ -420,6 +454,58 @@ class SupabaseStorageServiceTest(TestCase):
         self.assertFalse(result['success'])
         self.assertIn('error', result)
     
+    def _record_upload(self, session, result):
+        """Create the document row the upload views create for a successful upload"""
+        return ProcessedDocument.objects.create(
+            session=session,
+            filename="a.jpg",
+            file_type="jpg",
+            file_size=10,
+            source_file_path=result['file_path'],
+            content_digest=result['content_digest']
+        )
+    
+    def test_upload_file_reuses_identical_content(self):
+        """Test that re-uploading the same bytes in a session skips the second upload"""
+        bucket = self.mock_supabase.storage.from_.return_value
+        bucket.upload.return_value = MagicMock(spec=[])
+        bucket.get_public_url.return_value = "http://example.com/file.jpg"
+        session = UserSession.objects.create(session_key="test_session")
+        
+        first = self.storage_service.upload_file(
+            SimpleUploadedFile("a.jpg", b"same bytes", content_type="image/jpeg"), "test_session")
+        self._record_upload(session, first)
+        second = self.storage_service.upload_file(
+            SimpleUploadedFile("b.jpg", b"same bytes", content_type="image/jpeg"), "test_session")
+        
+        self.assertTrue(first['success'])
+        self.assertEqual(second, first)
+        self.assertEqual(bucket.upload.call_count, 1)
+    
+    def test_upload_file_uploads_again_after_session_cleanup(self):
+        """Test that deleting a session's documents invalidates its earlier uploads"""
+        bucket = self.mock_supabase.storage.from_.return_value
+        bucket.upload.return_value = MagicMock(spec=[])
+        session = UserSession.objects.create(session_key="test_session")
+        
+        first = self.storage_service.upload_file(
+            SimpleUploadedFile("a.jpg", b"same bytes", content_type="image/jpeg"), "test_session")
+        self._record_upload(session, first)
+        session.documents.all().delete()
+        self.storage_service.upload_file(
+            SimpleUploadedFile("a.jpg", b"same bytes", content_type="image/jpeg"), "test_session")
+        
+        self.assertEqual(bucket.upload.call_count, 2)
+    
+    def test_object_ids_sort_by_creation_time(self):
+        """Test that generated object names are version 7 UUIDs in creation order"""
+        first = _time_sortable_id()
+        time.sleep(0.002)
+        second = _time_sortable_id()
+        
+        self.assertEqual(first.version, 7)
+        self.assertLess(str(first), str(second))
+    
     def test_delete_file_success(self):
         """Test successful file deletion"""
         mock_response = MagicMock()
@@ -706,5 +792,373 @@ class DocumentProcessingIntegrationTest(TestCase):
         self.assertIn('attachment', response['Content-Disposition'])
 
 
+
+class DataStructuringServiceTest(TestCase):
+    """Test cases for DataStructuringService"""
+    
+    def setUp(self):
+        self.service = DataStructuringService()
+    
+    def test_tables_schema_passes_through(self):
+        """Test that LLM output already in the tables schema is not rebuilt"""
+        tables = [{'name': 'main', 'headers': ['text'], 'rows': [['line 1']]}]
+        result = self.service.structure_document_data({
+            'tables': tables,
+            'document_type': 'Document',
+            'parsing_method': 'text_fallback'
+        })
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['data'], {'tables': tables})
+        self.assertIs(result['data']['tables'], tables)
+    
+    def test_non_tables_sections_are_formatted(self):
+        """Test that other sections are still converted to field/value pairs"""
+        result = self.service.structure_document_data({
+            'bank_information': {'bank_name': 'Bank of Abyssinia'}
+        })
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(
+            result['data']['bank_information'],
+            [{'field': 'Bank Name', 'value': 'Bank of Abyssinia'}]
+        )
+
+
+class FileGenerationServiceTest(TestCase):
+    """Test cases for FileGenerationService"""
+    
+    def setUp(self):
+        self.service = FileGenerationService()
+    
+    def test_iter_sections_classifies_each_section_once(self):
+        """Test that sections are classified into the shared render list"""
+        sections = list(self.service._iter_sections({
+            'metadata': {'ignored': True},
+            'transactions': [{'id': 1, 'date': '2024-01-01', 'amount': 10}],
+            'bank_information': [{'field': 'Bank Name', 'value': 'Dashen Bank'}],
+            'notes': ['first', 'second'],
+            'dates': {'statement_date': None},
+            'empty': [],
+        }))
+        
+        self.assertEqual(sections, [
+            ('transactions', 'records', ['date', 'amount'], [['2024-01-01', 10]]),
+            ('bank_information', 'table', ['field', 'value'], [['Bank Name', 'Dashen Bank']]),
+            ('notes', 'list', None, [['first'], ['second']]),
+            ('dates', 'kv', ['Field', 'Value'], [['Statement Date', '']]),
+        ])
+
+
+class LLMParseCacheTest(TestCase):
+    """Test cases for reusing LLM parse results"""
+    
+    def setUp(self):
+        cache.clear()
+    
+    def test_same_text_is_parsed_once(self):
+        """Test that parsing identical text twice makes a single Gemini call"""
+        service = LLMService()
+        service.gemini_client = MagicMock()
+        parsed = {'success': True, 'data': {'name': 'Abebe'}, 'message': 'ok'}
+        
+        with patch.object(service, '_try_gemini_parsing', return_value=dict(parsed)) as mock_parse:
+            first = service.parse_banking_document("Name: Abebe")
+            second = service.parse_banking_document("Name: Abebe")
+        
+        self.assertEqual(mock_parse.call_count, 1)
+        self.assertEqual(first['data'], second['data'])
+        self.assertTrue(second['cached'])
+    
+    def test_reply_with_trailing_prose_is_parsed(self):
+        """Test that text after the JSON object, braces included, is ignored"""
+        service = LLMService()
+        reply = 'Here you go:\n{"rows": [{"x": 1}]}\nNote: {x} is the amount.'
+        
+        self.assertEqual(service._parse_llm_response(reply), {'rows': [{'x': 1}]})
+
+
+class GeminiStreamCollectionTest(TestCase):
+    """Test cases for collecting streamed Gemini output"""
+    
+    def test_stops_after_top_level_object(self):
+        """Test that collection stops once the JSON object closes, ignoring braces in strings"""
+        pieces = iter(['```json\n{"note": "a } b", ', '"rows": [{"x": 1}]}', 'never read'])
+        text = _collect_json_stream(pieces)
+        
+        self.assertEqual(json.loads(text[text.index('{'):]), {'note': 'a } b', 'rows': [{'x': 1}]})
+        self.assertEqual(next(pieces), 'never read')
+
+
+@requires_backup
+class StructuredDataCacheTest(TestCase):
+    """Test cases for reusing structured banking data"""
+    
+    def setUp(self):
+        cache.clear()
+        self.parsed = {
+            'document_type': 'bank_statement',
+            'confidence_score': 0.9,
+            'personal_information': {'full_name': 'Abebe Kebede'},
+            'financial_data': {'transactions': [{'date': '2024-01-01', 'description': 'Fee', 'amount': '5'}]},
+            'dates': {},
+            'bank_information': {}
+        }
+    
+    def test_repeat_structuring_is_served_from_cache(self):
+        """Test that identical parsed data is structured once and re-stamped on each hit"""
+        service = services_backup.DataStructuringService()
+        
+        with patch.object(services_backup, 'datetime') as mock_datetime:
+            mock_datetime.now.return_value.isoformat.side_effect = ['first', 'second']
+            first = service.structure_banking_data(self.parsed)
+            with patch.object(service, '_format_personal_info') as mock_format:
+                second = service.structure_banking_data(self.parsed)
+        
+        mock_format.assert_not_called()
+        self.assertEqual(first['data']['metadata']['processing_timestamp'], 'first')
+        self.assertEqual(second['data']['metadata']['processing_timestamp'], 'second')
+        self.assertNotIn('cached', second)
+        self.assertEqual(first['data']['transactions'], second['data']['transactions'])
+
+
+@requires_backup
+class OversizedOpenAIParseTest(TestCase):
+    """Test cases for splitting documents that exceed the OpenAI context window"""
+    
+    def setUp(self):
+        cache.clear()
+        self.service = services_backup.LLMService()
+        self.service.openai_client = MagicMock()
+    
+    @staticmethod
+    def _reply(data):
+        return {'success': True, 'data': data, 'provider': 'openai', 'confidence': data['confidence_score']}
+    
+    def test_split_pieces_are_unaltered_slices_that_fit(self):
+        """Test that splitting keeps the text intact, lines joined by single newlines"""
+        paragraphs = [f"paragraph {i} " + "word " * 40 for i in range(6)]
+        long_lines = "\n".join(f"line {i} " + "w " * 60 for i in range(8))
+        text = "\n\n".join(paragraphs + [long_lines, "x" * 900])
+        
+        with patch.object(services_backup, '_count_tokens', side_effect=lambda t: len(t) // 4):
+            pieces = services_backup._split_for_context(text, max_tokens=100)
+        
+        self.assertGreater(len(pieces), 1)
+        for piece in pieces:
+            self.assertIn(piece, text)
+            self.assertLessEqual(len(piece) // 4, 100)
+        self.assertIn("\nline 1 ", "".join(pieces))
+        self.assertEqual("".join(pieces).replace("\n", ""), text.replace("\n", ""))
+    
+    def test_pieces_are_merged(self):
+        """Test that piece results merge transactions in order and fill missing fields"""
+        replies = {
+            'part one': self._reply({
+                'document_type': 'bank_statement', 'confidence_score': 0.9,
+                'personal_information': {'full_name': 'Abebe Kebede', 'account_number': None},
+                'financial_data': {'account_balance': '100', 'transactions': [{'description': 'first'}]},
+                'dates': {}, 'bank_information': {'bank_name': None}
+            }),
+            'part two': self._reply({
+                'document_type': 'bank_statement', 'confidence_score': 0.7,
+                'personal_information': {'full_name': 'Other Name', 'account_number': '1000123'},
+                'financial_data': {'account_balance': '90', 'transactions': [{'description': 'second'}]},
+                'dates': {'due_date': '2024-02-01'}, 'bank_information': {'bank_name': 'CBE'}
+            }),
+        }
+        
+        with patch.object(services_backup, '_split_for_context', return_value=['part one', 'part two']), \
+                patch.object(self.service, '_parse_with_openai', side_effect=lambda piece, _type: replies[piece]):
+            result = self.service._parse_oversized_with_openai('whole document', 'bank_statement')
+        
+        data = result['data']
+        self.assertTrue(result['success'])
+        self.assertEqual(data['personal_information'], {'full_name': 'Abebe Kebede', 'account_number': '1000123'})
+        self.assertEqual(data['financial_data']['account_balance'], '100')
+        self.assertEqual(data['financial_data']['transactions'], [{'description': 'first'}, {'description': 'second'}])
+        self.assertEqual(data['dates'], {'due_date': '2024-02-01'})
+        self.assertEqual(data['bank_information'], {'bank_name': 'CBE'})
+        self.assertEqual(data['confidence_score'], 0.7)
+    
+    def test_failed_piece_fails_the_document(self):
+        """Test that one failed piece is returned instead of a partial merge"""
+        failure = {'success': False, 'error': 'AI service quota exceeded', 'data': {}}
+        
+        replies = {'a': self._reply({'confidence_score': 1}), 'b': failure}
+        
+        with patch.object(services_backup, '_split_for_context', return_value=['a', 'b']), \
+                patch.object(self.service, '_parse_with_openai', side_effect=lambda piece, _type: replies[piece]):
+            result = self.service._parse_oversized_with_openai('whole document', 'bank_statement')
+        
+        self.assertEqual(result, failure)
+    
+    def test_prompt_over_budget_is_split(self):
+        """Test that a prompt that can't fit the context window is never sent whole"""
+        merged = self._reply({'confidence_score': 0.8, 'financial_data': {'transactions': []}})
+        
+        with patch.object(services_backup, '_OPENAI_CONTEXT_TOKENS', 0), \
+                patch.object(self.service, '_parse_oversized_with_openai', return_value=merged) as mock_split:
+            result = self.service._parse_with_openai('Balance: 100', 'bank_statement')
+        
+        mock_split.assert_called_once_with('Balance: 100', 'bank_statement')
+        self.service.openai_client.chat.completions.create.assert_not_called()
+        self.assertEqual(result, merged)
+
+
+@requires_backup
+class TransactionStreamScannerTest(TestCase):
+    """Test cases for picking transactions out of a streamed JSON reply"""
+    
+    def feed_all(self, pieces):
+        scanner = services_backup._TransactionStreamScanner()
+        found = []
+        for piece in pieces:
+            found.append(scanner.feed(piece))
+        return found
+    
+    def test_key_split_across_chunks(self):
+        """Test that the transactions key is found when a chunk boundary falls inside it"""
+        found = self.feed_all(['{"financial_data": {"transac', 'tions": [{"amount": "5"}', ', {"amount": "7"}]}}'])
+        
+        self.assertEqual(found, [[], [{'amount': '5'}], [{'amount': '7'}]])
+    
+    def test_brace_inside_string(self):
+        """Test that a closing brace inside a string does not end the transaction"""
+        found = self.feed_all(['{"transactions": [{"description": "fee }', ' refund", "amount"', ': "3"}]}'])
+        
+        self.assertEqual(found, [[], [], [{'description': 'fee } refund', 'amount': '3'}]])
+    
+    def test_nested_objects(self):
+        """Test that inner objects close without releasing the outer transaction early"""
+        found = self.feed_all([
+            '{"personal_information": {"full_name": "Abebe"}, "transactions": [{"meta": {"ref": "A1"}',
+            ', "amount": "9"}, {"meta": {}}',
+            ']}'
+        ])
+        
+        self.assertEqual(found, [[], [{'meta': {'ref': 'A1'}, 'amount': '9'}, {'meta': {}}], []])
+    
+    def test_text_after_array_is_ignored(self):
+        """Test that only the first transactions array is read"""
+        found = self.feed_all(['{"transactions": [{"a": 1}], "other": {"transactions": [{"b": 2}]}}'])
+        
+        self.assertEqual(found, [[{'a': 1}]])
+    
+    def test_streamed_openai_parse_reports_transactions(self):
+        """Test that a streamed OpenAI parse hands each transaction to the callback"""
+        cache.clear()
+        service = services_backup.LLMService()
+        service.openai_client = MagicMock()
+        reply = json.dumps({
+            'document_type': 'bank_statement', 'confidence_score': 0.9,
+            'personal_information': {}, 'dates': {}, 'bank_information': {},
+            'financial_data': {'transactions': [{'amount': '1'}, {'amount': '2'}]}
+        })
+        chunks = [
+            MagicMock(choices=[MagicMock(delta=MagicMock(content=reply[i:i + 7]))])
+            for i in range(0, len(reply), 7)
+        ]
+        service.openai_client.chat.completions.create.return_value = iter(chunks)
+        received = []
+        
+        with patch.object(services_backup, '_throttle_openai'):
+            result = service._parse_with_openai('Balance: 100', 'bank_statement', on_transaction=received.append)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(received, [{'amount': '1'}, {'amount': '2'}])
+        self.assertTrue(service.openai_client.chat.completions.create.call_args.kwargs['stream'])
+
+
+@requires_backup
+class BatchOpenAIParseTest(TestCase):
+    """Test cases for packing several documents into one OpenAI request"""
+    
+    def setUp(self):
+        self.service = services_backup.LLMService()
+        self.service.openai_client = MagicMock()
+        throttle = patch.object(services_backup, '_throttle_openai')
+        throttle.start()
+        self.addCleanup(throttle.stop)
+    
+    @staticmethod
+    def _document(name):
+        return {
+            'document_type': 'bank_statement', 'confidence_score': 0.9,
+            'personal_information': {'full_name': name}, 'financial_data': {},
+            'dates': {}, 'bank_information': {}
+        }
+    
+    def _reply_with(self, results, finish_reason='stop'):
+        response = MagicMock()
+        response.choices[0].message.content = json.dumps({'results': results})
+        response.choices[0].finish_reason = finish_reason
+        self.service.openai_client.chat.completions.create.return_value = response
+    
+    def _parse_one_by_one(self):
+        return patch.object(
+            self.service, '_parse_with_openai',
+            side_effect=lambda text, _type: {'success': True, 'data': {'single': text}}
+        )
+    
+    def test_packed_group_is_split_back_per_document(self):
+        """Test that one request serves every document in a group"""
+        self._reply_with([self._document('Abebe'), self._document('Almaz')])
+        
+        with self._parse_one_by_one() as mock_single:
+            results = self.service.parse_batch_with_openai(['doc one', 'doc two'])
+        
+        mock_single.assert_not_called()
+        self.service.openai_client.chat.completions.create.assert_called_once()
+        self.assertEqual([r['data']['personal_information']['full_name'] for r in results], ['Abebe', 'Almaz'])
+        # Each packed document gets the single-document completion budget
+        self.assertEqual(self.service.openai_client.chat.completions.create.call_args.kwargs['max_tokens'],
+                         2 * services_backup._OPENAI_MAX_OUTPUT_TOKENS)
+    
+    def test_truncated_reply_falls_back(self):
+        """Test that a reply cut off at the token limit is re-parsed one by one"""
+        self._reply_with([self._document('Abebe'), self._document('Almaz')], finish_reason='length')
+        
+        with self._parse_one_by_one() as mock_single:
+            self.service.parse_batch_with_openai(['doc one', 'doc two'])
+        
+        self.assertEqual(mock_single.call_count, 2)
+    
+    def test_groups_shrink_to_fit_the_context_window(self):
+        """Test that documents whose prompt and completion can't share a request are sent alone"""
+        # Short enough for the character limit, but 2 x (6500 + completion budget) > 16000 tokens
+        document_tokens = lambda text: 6500 if text.startswith('doc') else 0
+        
+        with patch.object(services_backup, '_count_tokens', side_effect=document_tokens), \
+                self._parse_one_by_one() as mock_single:
+            self.service.parse_batch_with_openai(['doc one', 'doc two', 'doc three'])
+        
+        self.service.openai_client.chat.completions.create.assert_not_called()
+        self.assertEqual(mock_single.call_count, 3)
+    
+    def test_result_count_mismatch_falls_back(self):
+        """Test that a response with the wrong number of results is re-parsed one by one"""
+        self._reply_with([self._document('Abebe')])
+        
+        with self._parse_one_by_one() as mock_single:
+            results = self.service.parse_batch_with_openai(['doc one', 'doc two'])
+        
+        self.assertEqual(mock_single.call_count, 2)
+        self.assertEqual([r['data'] for r in results], [{'single': 'doc one'}, {'single': 'doc two'}])
+    
+    def test_invalid_result_falls_back(self):
+        """Test that a group with a result failing validation is re-parsed one by one"""
+        invalid = self._document('Almaz')
+        del invalid['financial_data']
+        self._reply_with([self._document('Abebe'), invalid])
+        
+        with self._parse_one_by_one() as mock_single:
+            results = self.service.parse_batch_with_openai(['doc one', 'doc two', 'doc three'], k=2)
+        
+        # The first group falls back; the lone third document is always parsed by itself
+        self.assertEqual(mock_single.call_count, 3)
+        self.assertEqual([r['data'] for r in results],
+                         [{'single': 'doc one'}, {'single': 'doc two'}, {'single': 'doc three'}])
+
 # Import mock_open for file mocking
 from unittest.mock import mock_open
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
@@ -7,6 +7,10 @@ from django.utils.decorators import method_decorator
 from django.views import View
 import json
 import logging
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 import io
 import os
 from datetime import datetime
@@ -32,6 +36,16 @@ from .models import ProcessedDocument
 logger = logging.getLogger(__name__)
 
 
+def _json_response(payload):
+    """JsonResponse for payloads carrying structured data, encoded with orjson when installed"""
+    if orjson is not None:
+        try:
+            return HttpResponse(orjson.dumps(payload), content_type='application/json')
+        except TypeError:
+            pass  # a type orjson can't encode; DjangoJSONEncoder may still handle it
+    return JsonResponse(payload)
+
+
 class DocumentUploadView(View):
     """Main view for document upload and processing"""
     
@@ -96,7 +110,8 @@ class DocumentUploadView(View):
                         file_type=file_type,
                         file_size=uploaded_file.size,
                         processing_status='pending',
-                        source_file_path=upload_result.get('file_path')
+                        source_file_path=upload_result.get('file_path'),
+                        content_digest=upload_result.get('content_digest')
                     )
                     
                     if is_ajax:
@@ -188,7 +203,8 @@ def upload_ajax(request):
                     file_type=file_type,
                     file_size=uploaded_file.size,
                     processing_status='pending',
-                    source_file_path=upload_result.get('file_path')
+                    source_file_path=upload_result.get('file_path'),
+                    content_digest=upload_result.get('content_digest')
                 )
                 
                 return JsonResponse({
@@ -512,31 +528,32 @@ def process_document(request):
         from django.core.files.uploadedfile import SimpleUploadedFile
         base_name = os.path.splitext(document.filename)[0]
 
+        pending_uploads = []
         if excel_bytes:
-            excel_upload = SimpleUploadedFile(
+            pending_uploads.append(('excel', SimpleUploadedFile(
                 name=f"{base_name}_cleaned.xlsx",
                 content=excel_bytes,
                 content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            try:
-                up_res = storage_service.upload_file(excel_upload, user_session.session_key)
-                if up_res.get('success'):
-                    uploaded_files['excel'] = up_res.get('file_path')
-            except Exception as e:
-                logger.warning(f"Excel upload failed: {e}")
-
+            )))
         if pdf_bytes:
-            pdf_upload = SimpleUploadedFile(
+            pending_uploads.append(('pdf', SimpleUploadedFile(
                 name=f"{base_name}_output.pdf",
                 content=pdf_bytes,
                 content_type='application/pdf'
+            )))
+
+        # Upload all outputs in one concurrent batch
+        try:
+            upload_results = storage_service.upload_files(
+                [upload for _, upload in pending_uploads], user_session.session_key
             )
-            try:
-                up_res = storage_service.upload_file(pdf_upload, user_session.session_key)
+            for (kind, _), up_res in zip(pending_uploads, upload_results):
                 if up_res.get('success'):
-                    uploaded_files['pdf'] = up_res.get('file_path')
-            except Exception as e:
-                logger.warning(f"PDF upload failed: {e}")
+                    uploaded_files[kind] = up_res.get('file_path')
+                else:
+                    logger.warning(f"{kind.upper()} upload failed: {up_res.get('error')}")
+        except Exception as e:
+            logger.warning(f"Output upload failed: {e}")
         
         # Step 6: Update document with complete results
         word_count = len((extracted_text or '').split())
@@ -561,7 +578,7 @@ def process_document(request):
         document.error_details = {'stage': 'completed', 'progress': 100}
         document.save()
         
-        return JsonResponse({
+        return _json_response({
             'success': True,
             'message': 'Document processed successfully',
             'data': {
@@ -852,7 +869,7 @@ def get_document_results(request, document_id):
         # Get structured data
         structured_data = document.extracted_data.get('structured_data', {})
         
-        return JsonResponse({
+        return _json_response({
             'success': True,
             'document_id': document.id,
             'filename': document.filename,